@@ -1,37 +1,94 @@
 """Xenia Espresso Machine integration."""
 
-import logging
-
-from aiohttp import ClientError
-
-from homeassistant.const import CONF_HOST
+from homeassistant.const import CONF_HOST, CONF_MAC
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.typing import ConfigType
+
+from .const import PLATFORMS, XENIA_DOMAIN
+from .coordinator import (
+    XeniaConfigEntry,
+    XeniaDataUpdateCoordinator,
+    async_get_cache_store,
+)
+from .history import async_remove_shot_history
+from .machines import (
+    async_get_machine,
+    async_setup_alias,
+    async_track_machine,
+    is_machine_owner,
+)
+from .metrics import XeniaMetricsView
+from .power import async_get_power_manager
+from .services import async_setup_services
+from .websocket_api import async_setup_websocket_api
 
-from .const import PLATFORMS
-from .coordinator import XeniaConfigEntry, XeniaDataUpdateCoordinator
-from .xenia import XeniaMachineData
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(XENIA_DOMAIN)
 
-_LOGGER = logging.getLogger(__name__)
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Xenia integration services and WebSocket API."""
+    async_setup_services(hass)
+    async_setup_websocket_api(hass)
+    hass.http.register_view(XeniaMetricsView())
+    return True
+
+
+async def _async_get_mac(hass: HomeAssistant, entry: XeniaConfigEntry) -> str | None:
+    """Return the MAC of the machine of entry, from its data or cached state."""
+    if mac := entry.data.get(CONF_MAC):
+        return mac
+    cached = await async_get_cache_store(hass, entry.entry_id).async_load()
+    return ((cached or {}).get("overview_single") or {}).get("MA_MAC")
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: XeniaConfigEntry) -> bool:
     """Set up Xenia from a config entry."""
+    mac = await _async_get_mac(hass, entry)
+    if (owner := async_get_machine(hass, mac)) is not None:
+        # The same machine under another host, polling it twice would only
+        # double the load on it.
+        entry.async_on_unload(async_setup_alias(hass, entry, owner))
+        return True
     host = entry.data[CONF_HOST]
     session = async_get_clientsession(hass)
     coordinator = XeniaDataUpdateCoordinator(hass, entry, host, session)
-    try:
-        coordinator.machine_data = await coordinator.xenia.get_machine()
-    except (ClientError, TimeoutError, OSError) as err:
-        _LOGGER.debug("Machine info fetch failed: %s", err)
-        coordinator.machine_data = XeniaMachineData.from_dict({})
-    await coordinator.async_config_entry_first_refresh()
+    # Entities are set up from the last known state, the machine is only
+    # contacted in the background so an unreachable machine can't delay startup.
+    await coordinator.async_load_cache()
     entry.runtime_data = coordinator
+    # Shot consumers are started before the platforms, so entities subscribing
+    # later already see their results for the same shot.
+    entry.async_on_unload(coordinator.shots.async_start())
+    entry.async_on_unload(coordinator.phases.async_start())
+    entry.async_on_unload(coordinator.target_weight.async_start())
+    entry.async_on_unload(coordinator.shot_index.async_start())
+    entry.async_on_unload(coordinator.anomalies.async_start())
+    entry.async_on_unload(coordinator.history.async_start())
+    entry.async_on_unload(coordinator.stream.async_start())
+    entry.async_on_unload(coordinator.eco_policy.async_start())
+    entry.async_on_unload(coordinator.recovery.async_start())
+    entry.async_on_unload(async_get_power_manager(hass).async_register(coordinator))
+    entry.async_on_unload(async_track_machine(hass, entry, coordinator))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_create_background_task(
+        hass,
+        coordinator.async_background_refresh(),
+        f"{entry.domain}_{entry.entry_id}_initial_refresh",
+    )
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: XeniaConfigEntry) -> bool:
     """Unload a config entry."""
+    if not is_machine_owner(entry):
+        return True
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: XeniaConfigEntry) -> None:
+    """Remove the cached state and shot history of a deleted config entry."""
+    await async_get_cache_store(hass, entry.entry_id).async_remove()
+    await async_remove_shot_history(hass, entry.entry_id)
@@ -0,0 +1,299 @@
+"""Streaming anomaly detection on boiler temperatures and pressures."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import logging
+import math
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import issue_registry as ir
+
+from .const import XENIA_DOMAIN
+from .xenia import MachineStatus, SteamBoilerStatus
+
+if TYPE_CHECKING:
+    from .coordinator import XeniaCoordinatorData, XeniaDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# The slow EWMA is the learned baseline, the fast one follows the signal. A
+# drift is the distance between both in units of the baseline deviation.
+SLOW_ALPHA = 0.0005
+FAST_ALPHA = 0.05
+WARMUP_SAMPLES = 1800
+MIN_STD = 0.05
+RAISE_SCORE = 4.0
+CLEAR_SCORE = 2.0
+HYSTERESIS_SAMPLES = 30
+# While a signal drifts its baseline keeps adapting at this fraction of the
+# normal rate, so a lasting change is eventually learned as the new normal.
+ANOMALOUS_ALPHA_FACTOR = 0.1
+# Heat-up after switching on (or off ECO) or changing a setpoint is not an
+# anomaly.
+SETTLE_SECONDS: dict[MachineStatus, float] = {
+    MachineStatus.ON: 1800,
+    MachineStatus.ECO: 600,
+    MachineStatus.BREWING: 5,
+    MachineStatus.DRAINING: 5,
+}
+# Back to ON after a shot the boilers are already hot, only the dip of the
+# shot itself is skipped.
+AFTER_SHOT_SETTLE_SECONDS = 60
+_SHOT_STATES = (MachineStatus.BREWING, MachineStatus.DRAINING)
+
+
+@dataclass(frozen=True)
+class AnomalySignal:
+    """A monitored signal, value_fn returns None when it does not apply."""
+
+    key: str
+    name: str
+    value_fn: Callable[[XeniaCoordinatorData], float | None]
+
+
+def _steam_boiler_pressure_error(data: XeniaCoordinatorData) -> float | None:
+    if data.overview.sb_status != SteamBoilerStatus.ON:
+        return None
+    return data.overview.sb_sens_press - data.overview_single.sb_set_press
+
+
+def _setpoints(data: XeniaCoordinatorData) -> tuple[float, ...]:
+    single = data.overview_single
+    return (
+        single.bb_set_temp,
+        single.bg_set_temp,
+        single.sb_set_press,
+        single.pu_set_press,
+    )
+
+
+# Temperatures and pressures are tracked relative to their setpoints, so
+# changing a setpoint doesn't look like a drift.
+ANOMALY_SIGNALS: tuple[AnomalySignal, ...] = (
+    AnomalySignal(
+        key="bb_sens_temp_a",
+        name="brew boiler temperature",
+        value_fn=lambda data: (
+            data.overview.bb_sens_temp_a - data.overview_single.bb_set_temp
+        ),
+    ),
+    AnomalySignal(
+        key="bg_sens_temp_a",
+        name="brew group temperature",
+        value_fn=lambda data: (
+            data.overview.bg_sens_temp_a - data.overview_single.bg_set_temp
+        ),
+    ),
+    AnomalySignal(
+        key="sb_sens_press",
+        name="steam boiler pressure",
+        value_fn=_steam_boiler_pressure_error,
+    ),
+    AnomalySignal(
+        key="pu_sens_press",
+        name="pump pressure",
+        value_fn=lambda data: (
+            data.overview.pu_sens_press - data.overview_single.pu_set_press
+        ),
+    ),
+)
+
+
+class EwmaBaseline:
+    """Constant memory baseline of one signal in one machine state."""
+
+    __slots__ = ("count", "fast", "mean", "var")
+
+    def __init__(
+        self, mean: float = 0.0, var: float = 0.0, fast: float = 0.0, count: int = 0
+    ) -> None:
+        """Initialize the baseline."""
+        self.mean = mean
+        self.var = var
+        self.fast = fast
+        self.count = count
+
+    def update(self, value: float) -> float | None:
+        """Add a sample and return its drift score, None while warming up."""
+        if self.count == 0:
+            self.mean = self.fast = value
+        self.count += 1
+        score = None
+        if self.count > WARMUP_SAMPLES:
+            std = max(math.sqrt(self.var), MIN_STD)
+            score = abs(self.fast - self.mean) / std
+        self.fast += FAST_ALPHA * (value - self.fast)
+        # A drifting signal must not drag its own baseline along quickly.
+        alpha = SLOW_ALPHA
+        if score is not None and score >= CLEAR_SCORE:
+            alpha *= ANOMALOUS_ALPHA_FACTOR
+        diff = value - self.mean
+        self.mean += alpha * diff
+        self.var = (1 - alpha) * (self.var + alpha * diff * diff)
+        return score
+
+    def to_list(self) -> list[float]:
+        return [self.mean, self.var, self.fast, self.count]
+
+
+class _SignalState:
+    __slots__ = ("above", "below", "raised")
+
+    def __init__(self) -> None:
+        self.above = 0
+        self.below = 0
+        self.raised = False
+
+
+class XeniaAnomalyDetector:
+    """Score coordinator updates against per-state EWMA baselines.
+
+    A repair issue is raised when a signal stays far from its baseline for
+    HYSTERESIS_SAMPLES updates in a row and removed once it is back. Each
+    machine state has its own baselines and issues.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator: XeniaDataUpdateCoordinator
+    ) -> None:
+        """Initialize the anomaly detector."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._baselines: dict[tuple[str, MachineStatus], EwmaBaseline] = {}
+        self._states: dict[tuple[MachineStatus, str], _SignalState] = {}
+        # Last status and setpoints seen, only to detect changes, baselines
+        # are keyed by the status of each sample.
+        self._status: MachineStatus | None = None
+        self._setpoints: tuple[float, ...] | None = None
+        self._settle_until = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the learned baselines for persistence."""
+        return {
+            f"{key}/{int(status)}": baseline.to_list()
+            for (key, status), baseline in self._baselines.items()
+        }
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Restore learned baselines."""
+        for name, (mean, var, fast, count) in data.items():
+            key, status = name.rsplit("/", 1)
+            self._baselines[(key, MachineStatus(int(status)))] = EwmaBaseline(
+                mean, var, fast, int(count)
+            )
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start following coordinator updates, returns a stop callback."""
+        # Issues of a previous run can't be cleared by this one, start fresh.
+        self._async_clear_issues()
+        remove_listener = self.coordinator.async_add_listener(
+            self._handle_coordinator_update
+        )
+
+        @callback
+        def _stop() -> None:
+            remove_listener()
+            self._async_clear_issues()
+
+        return _stop
+
+    def _issue_id(self, signal: AnomalySignal, status: MachineStatus) -> str:
+        return (
+            f"anomaly_{self.coordinator.config_entry.entry_id}"
+            f"_{signal.key}_{int(status)}"
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        data = self.coordinator.data
+        status = data.overview.ma_status
+        now = time.monotonic()
+        setpoints = _setpoints(data)
+        if status != self._status:
+            if status == MachineStatus.ON and self._status in _SHOT_STATES:
+                self._settle(now, AFTER_SHOT_SETTLE_SECONDS)
+            else:
+                self._settle(now, SETTLE_SECONDS.get(status, 0))
+            self._status = status
+        if setpoints != self._setpoints:
+            self._settle(now, SETTLE_SECONDS.get(status, 0))
+            self._setpoints = setpoints
+        if status not in SETTLE_SECONDS or now < self._settle_until:
+            return
+        for signal in ANOMALY_SIGNALS:
+            value = signal.value_fn(data)
+            if value is None:
+                continue
+            baseline = self._baselines.get((signal.key, status))
+            if baseline is None:
+                baseline = self._baselines[(signal.key, status)] = EwmaBaseline()
+            score = baseline.update(value)
+            if score is None:
+                continue
+            self._check_score(signal, status, score, value, baseline)
+
+    def _settle(self, now: float, seconds: float) -> None:
+        """Skip scoring for seconds, without cutting a longer window short."""
+        self._settle_until = max(self._settle_until, now + seconds)
+
+    def _check_score(
+        self,
+        signal: AnomalySignal,
+        status: MachineStatus,
+        score: float,
+        value: float,
+        baseline: EwmaBaseline,
+    ) -> None:
+        state = self._states.get((status, signal.key))
+        if state is None:
+            state = self._states[(status, signal.key)] = _SignalState()
+        if score >= RAISE_SCORE:
+            state.above += 1
+            state.below = 0
+        elif score < CLEAR_SCORE:
+            state.below += 1
+            state.above = 0
+        if not state.raised and state.above >= HYSTERESIS_SAMPLES:
+            state.raised = True
+            _LOGGER.warning(
+                "Anomaly on %s of %s in state %s: %.2f vs baseline %.2f",
+                signal.name,
+                self.coordinator.config_entry.title,
+                status,
+                value,
+                baseline.mean,
+            )
+            ir.async_create_issue(
+                self.hass,
+                XENIA_DOMAIN,
+                self._issue_id(signal, status),
+                is_fixable=False,
+                severity=ir.IssueSeverity.WARNING,
+                translation_key="signal_anomaly",
+                translation_placeholders={
+                    "name": self.coordinator.config_entry.title,
+                    "signal": signal.name,
+                    "state": str(status),
+                    "value": f"{value:.2f}",
+                    "baseline": f"{baseline.mean:.2f}",
+                },
+            )
+        elif state.raised and state.below >= HYSTERESIS_SAMPLES:
+            self._async_clear_issue(signal, status)
+
+    @callback
+    def _async_clear_issue(self, signal: AnomalySignal, status: MachineStatus) -> None:
+        if (state := self._states.get((status, signal.key))) is not None:
+            state.raised = False
+        ir.async_delete_issue(self.hass, XENIA_DOMAIN, self._issue_id(signal, status))
+
+    @callback
+    def _async_clear_issues(self) -> None:
+        for signal in ANOMALY_SIGNALS:
+            for status in SETTLE_SECONDS:
+                self._async_clear_issue(signal, status)
@@ -16,7 +16,9 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ):
     coordinator = entry.runtime_data
-    async_add_entities([XeniaWaterTankSensor(coordinator)])
+    async_add_entities(
+        [XeniaWaterTankSensor(coordinator), XeniaReadyForShotSensor(coordinator)]
+    )
 
 
 class XeniaWaterTankSensor(XeniaEntity, BinarySensorEntity):
@@ -34,3 +36,20 @@ class XeniaWaterTankSensor(XeniaEntity, BinarySensorEntity):
         # is_on = True means "problem" (tank empty)
         # Xenia returns 2 when empty, 1 when water present
         return self.coordinator.data.overview_single.pu_sens_water_tank_level == 2
+
+
+class XeniaReadyForShotSensor(XeniaEntity, BinarySensorEntity):
+    """On while the machine is on and brew boiler and group have recovered."""
+
+    _attr_translation_key = "ready_for_next_shot"
+    _attr_icon = "mdi:coffee-outline"
+
+    def __init__(self, coordinator: XeniaDataUpdateCoordinator) -> None:
+        super().__init__(coordinator)
+        self._attr_unique_id = (
+            f"{self.coordinator.config_entry.data[CONF_HOST]}_ready_for_next_shot"
+        )
+
+    @property
+    def is_on(self) -> bool:
+        return self.coordinator.recovery.ready
@@ -4,12 +4,38 @@ from typing import Any
 from aiohttp import ClientError
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigEntry, ConfigFlow, ConfigFlowResult
-from homeassistant.const import CONF_HOST
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
+from homeassistant.const import CONF_HOST, CONF_MAC
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo
 
-from .const import DEFAULT_HOST, XENIA_DOMAIN
+from .const import (
+    CONF_ECO_POLICY,
+    CONF_MAX_SHOT_SAMPLES,
+    CONF_MAX_SHOT_SECONDS,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_POWER_BUDGET,
+    DEFAULT_ECO_POLICY,
+    DEFAULT_HOST,
+    DEFAULT_MAX_SHOT_SAMPLES,
+    DEFAULT_MAX_SHOT_SECONDS,
+    DEFAULT_MIN_UPDATE_INTERVAL,
+    DEFAULT_POWER_BUDGET,
+    XENIA_DOMAIN,
+)
+from .discovery import (
+    XeniaDiscoveredMachine,
+    async_get_scan_networks,
+    async_probe_host,
+    async_scan_networks,
+    normalize_mac,
+)
 from .xenia import Xenia
 
 DATA_SCHEMA_USER = vol.Schema(
@@ -19,6 +45,29 @@ DATA_SCHEMA_USER = vol.Schema(
 )
 
 
+def _entry_macs(entry: ConfigEntry) -> set[str]:
+    """Return the configured and last known MAC of an entry."""
+    macs: set[str] = set()
+    if mac := entry.data.get(CONF_MAC):
+        macs.add(normalize_mac(mac))
+    coordinator = getattr(entry, "runtime_data", None)
+    if coordinator is not None and coordinator.data is not None:
+        if mac := coordinator.data.overview_single.ma_mac:
+            macs.add(normalize_mac(mac))
+    return macs
+
+
+def _configured_macs(
+    hass: HomeAssistant, exclude: ConfigEntry | None = None
+) -> set[str]:
+    """Return the MACs of all entries, except those of exclude."""
+    macs: set[str] = set()
+    for entry in hass.config_entries.async_entries(XENIA_DOMAIN, include_ignore=False):
+        if exclude is None or entry.entry_id != exclude.entry_id:
+            macs |= _entry_macs(entry)
+    return macs
+
+
 class XeniaConfigFlow(ConfigFlow, domain=XENIA_DOMAIN):
     VERSION = 1
     _supported_machine_type = 3
@@ -27,6 +76,13 @@ class XeniaConfigFlow(ConfigFlow, domain=XENIA_DOMAIN):
         self._entry: ConfigEntry | None = None
         self._host: str | None = None
         self._name: str | None = None
+        self._mac: str | None = None
+        self._discovered: dict[str, XeniaDiscoveredMachine] = {}
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        return XeniaOptionsFlow()
 
     async def _async_test_connection(
         self, hass: HomeAssistant, host: str
@@ -42,15 +98,38 @@ class XeniaConfigFlow(ConfigFlow, domain=XENIA_DOMAIN):
                 and machine.ma_type != self._supported_machine_type
             ):
                 return "unsupported_machine_type"
+            overview_single = await asyncio.wait_for(
+                xenia.get_overview_single(), timeout=8
+            )
+            self._mac = normalize_mac(overview_single.ma_mac) or self._mac
             return None
         except (TimeoutError, ClientError, OSError):
             return "cannot_connect"
 
+    def _configured_hosts(self) -> set[str]:
+        return {
+            entry.data[CONF_HOST]
+            for entry in self._async_current_entries(include_ignore=False)
+            if CONF_HOST in entry.data
+        }
+
+    def _is_configured(self, machine: XeniaDiscoveredMachine) -> bool:
+        if machine.host in self._configured_hosts():
+            return True
+        return bool(machine.mac) and machine.mac in _configured_macs(self.hass)
+
     def _create_entry(self, title: str) -> ConfigFlowResult:
         assert self._host is not None
+        # Hosts differ for the same machine (name, IP, DHCP changes), its MAC
+        # doesn't.
+        if self._mac and self._mac in _configured_macs(self.hass):
+            return self.async_abort(reason="already_configured")
+        data = {CONF_HOST: self._host}
+        if self._mac:
+            data[CONF_MAC] = self._mac
         return self.async_create_entry(
             title=title,
-            data={CONF_HOST: self._host},
+            data=data,
         )
 
     async def _update_entry(self) -> None:
@@ -59,12 +138,99 @@ class XeniaConfigFlow(ConfigFlow, domain=XENIA_DOMAIN):
         self.hass.config_entries.async_update_entry(
             self._entry,
             data={
+                **self._entry.data,
                 CONF_HOST: self._host,
+                **({CONF_MAC: self._mac} if self._mac else {}),
             },
         )
         await self.hass.config_entries.async_reload(self._entry.entry_id)
 
     async def async_step_user(
+        self, _: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        return self.async_show_menu(step_id="user", menu_options=["scan", "manual"])
+
+    async def async_step_scan(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            machine = self._discovered[user_input[CONF_HOST]]
+            self._host = machine.host
+            self._name = machine.host
+            self._mac = machine.mac or None
+
+            await self.async_set_unique_id(self._host)
+            self._abort_if_unique_id_configured()
+            error = await self._async_test_connection(self.hass, self._host)
+            if error is None:
+                return self._create_entry(self._name)
+            errors["base"] = error
+        else:
+            session = async_get_clientsession(self.hass)
+            networks = await async_get_scan_networks(self.hass)
+            self._discovered = {
+                machine.host: machine
+                for machine in await async_scan_networks(session, networks)
+                if not self._is_configured(machine)
+            }
+
+        if not self._discovered:
+            return self.async_abort(reason="no_devices_found")
+
+        schema = vol.Schema(
+            {
+                vol.Required(CONF_HOST): vol.In(
+                    {
+                        host: machine.label
+                        for host, machine in self._discovered.items()
+                    }
+                ),
+            }
+        )
+        return self.async_show_form(step_id="scan", data_schema=schema, errors=errors)
+
+    async def async_step_zeroconf(
+        self, discovery_info: ZeroconfServiceInfo
+    ) -> ConfigFlowResult:
+        host = str(discovery_info.ip_address)
+        # mDNS announcements repeat, configured machines aren't probed again.
+        await self.async_set_unique_id(host)
+        self._abort_if_unique_id_configured(updates={CONF_HOST: host})
+        if host in self._configured_hosts():
+            return self.async_abort(reason="already_configured")
+        session = async_get_clientsession(self.hass)
+        machine = await async_probe_host(session, host)
+        if machine is None:
+            return self.async_abort(reason="not_xenia_device")
+        # A configured machine that got a new IP address.
+        if self._is_configured(machine):
+            return self.async_abort(reason="already_configured")
+
+        self._host = machine.host
+        self._name = machine.host
+        self._mac = machine.mac or None
+        self.context["title_placeholders"] = {"name": machine.label}
+        return await self.async_step_zeroconf_confirm()
+
+    async def async_step_zeroconf_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        assert self._host is not None
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            error = await self._async_test_connection(self.hass, self._host)
+            if error is None:
+                return self._create_entry(self._name or self._host)
+            errors["base"] = error
+
+        return self.async_show_form(
+            step_id="zeroconf_confirm",
+            description_placeholders={"name": self._name or self._host},
+            errors=errors,
+        )
+
+    async def async_step_manual(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
         errors: dict[str, str] = {}
@@ -81,7 +247,7 @@ class XeniaConfigFlow(ConfigFlow, domain=XENIA_DOMAIN):
             errors["base"] = error
 
         return self.async_show_form(
-            step_id="user", data_schema=DATA_SCHEMA_USER, errors=errors
+            step_id="manual", data_schema=DATA_SCHEMA_USER, errors=errors
         )
 
     async def async_step_reconfigure(
@@ -91,6 +257,7 @@ class XeniaConfigFlow(ConfigFlow, domain=XENIA_DOMAIN):
         assert entry is not None
         self._entry = entry
         self._host = entry.data.get(CONF_HOST, DEFAULT_HOST)
+        self._mac = entry.data.get(CONF_MAC)
         self._name = entry.title or self._host
 
         return await self.async_step_reconfigure_confirm()
@@ -107,6 +274,9 @@ class XeniaConfigFlow(ConfigFlow, domain=XENIA_DOMAIN):
             new_host = user_input[CONF_HOST].strip()
             error = await self._async_test_connection(self.hass, new_host)
             if error is None:
+                # The new host may be another machine that is configured too.
+                if self._mac and self._mac in _configured_macs(self.hass, self._entry):
+                    return self.async_abort(reason="already_configured")
                 self._host = new_host
                 await self._update_entry()
                 return self.async_abort(reason="reconfigure_successful")
@@ -118,3 +288,55 @@ class XeniaConfigFlow(ConfigFlow, domain=XENIA_DOMAIN):
             description_placeholders={"name": self._name or self._host},
             errors=errors,
         )
+
+
+class XeniaOptionsFlow(OptionsFlow):
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        options = self.config_entry.options
+        # An entry sharing the machine of another one has no coordinator of
+        # its own, options only apply to the entry that polls the machine.
+        coordinator = getattr(self.config_entry, "runtime_data", None)
+        is_owner = coordinator is not None and coordinator.config_entry is (
+            self.config_entry
+        )
+        if not is_owner and _entry_macs(self.config_entry) & _configured_macs(
+            self.hass, self.config_entry
+        ):
+            return self.async_abort(reason="duplicate_machine")
+        if user_input is not None:
+            # Options set through entities (e.g. power on behavior) are kept.
+            return self.async_create_entry(data={**options, **user_input})
+
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_MAX_SHOT_SECONDS,
+                    default=options.get(
+                        CONF_MAX_SHOT_SECONDS, DEFAULT_MAX_SHOT_SECONDS
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=20, max=600)),
+                vol.Required(
+                    CONF_MAX_SHOT_SAMPLES,
+                    default=options.get(
+                        CONF_MAX_SHOT_SAMPLES, DEFAULT_MAX_SHOT_SAMPLES
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=30, max=3000)),
+                vol.Required(
+                    CONF_POWER_BUDGET,
+                    default=options.get(CONF_POWER_BUDGET, DEFAULT_POWER_BUDGET),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=63)),
+                vol.Required(
+                    CONF_MIN_UPDATE_INTERVAL,
+                    default=options.get(
+                        CONF_MIN_UPDATE_INTERVAL, DEFAULT_MIN_UPDATE_INTERVAL
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.2, max=10)),
+                vol.Required(
+                    CONF_ECO_POLICY,
+                    default=options.get(CONF_ECO_POLICY, DEFAULT_ECO_POLICY),
+                ): bool,
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema)
@@ -4,7 +4,25 @@ XENIA_DOMAIN = "xenia_home"
 PLATFORMS = ["binary_sensor", "event", "number", "select", "sensor", "switch"]
 DEFAULT_HOST = "xenia.local"
 
+STORAGE_VERSION = 1
+CACHE_SAVE_INTERVAL = 60
+
 CONF_POWER_ON_BEHAVIOR = "power_on_behavior"
+CONF_MAX_SHOT_SECONDS = "max_shot_seconds"
+CONF_MAX_SHOT_SAMPLES = "max_shot_samples"
+CONF_POWER_BUDGET = "power_budget"
+CONF_TARGET_WEIGHT = "target_weight"
+CONF_MIN_UPDATE_INTERVAL = "min_update_interval"
+CONF_PROFILES = "profiles"
+CONF_ECO_POLICY = "eco_policy"
+
+DEFAULT_MAX_SHOT_SECONDS = 120
+DEFAULT_MAX_SHOT_SAMPLES = 300
+DEFAULT_POWER_BUDGET = 0
+DEFAULT_TARGET_WEIGHT = 0
+# The baseline 1 Hz, faster polling only when chosen in the options.
+DEFAULT_MIN_UPDATE_INTERVAL = 1.0
+DEFAULT_ECO_POLICY = False
 
 
 class PowerOnBehavior(str, Enum):
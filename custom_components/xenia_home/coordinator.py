@@ -2,13 +2,36 @@ import asyncio
 from dataclasses import dataclass
 from datetime import timedelta
 import logging
+import time
+from typing import Any
 
-from aiohttp import ClientSession
+from aiohttp import ClientError, ClientSession
 
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from .anomaly import XeniaAnomalyDetector
+from .const import (
+    CACHE_SAVE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    DEFAULT_MIN_UPDATE_INTERVAL,
+    STORAGE_VERSION,
+    XENIA_DOMAIN,
+)
+from .curves import XeniaShotCurves
+from .eco import XeniaEcoPolicy
+from .history import XeniaShotHistory
+from .phases import XeniaBrewPhaseSegmenter
+from .recovery import XeniaRecoveryTracker
+from .shot import XeniaShotPipeline
+from .similarity import XeniaShotIndex
+from .stream import XeniaShotStream
+from .tuning import INITIAL_INTERVAL, XeniaPollTuner
+from .weight import XeniaTargetWeightPredictor
 from .xenia import Xenia, XeniaMachineData, XeniaOverviewData, XeniaOverviewSingleData
 
 _LOGGER = logging.getLogger(__name__)
@@ -16,6 +39,11 @@ _LOGGER = logging.getLogger(__name__)
 type XeniaConfigEntry = ConfigEntry[XeniaDataUpdateCoordinator]
 
 
+def async_get_cache_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the store holding the last known state of a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{XENIA_DOMAIN}.{entry_id}")
+
+
 @dataclass
 class XeniaCoordinatorData:
     """Data Type of XeniaDataUpdateCoordinator's data."""
@@ -39,21 +67,141 @@ class XeniaDataUpdateCoordinator(DataUpdateCoordinator[XeniaCoordinatorData]):
             hass,
             _LOGGER,
             name=config_entry.entry_id,
-            update_interval=timedelta(seconds=1),
+            update_interval=timedelta(seconds=INITIAL_INTERVAL),
             config_entry=config_entry,
+            # Listeners are only notified when the data actually changed.
+            always_update=False,
         )
         self.data = XeniaCoordinatorData(
             XeniaOverviewData.from_dict({}),
             XeniaOverviewSingleData.from_dict({}),
         )
         self.xenia = Xenia(host, session)
+        self.tuner = XeniaPollTuner(
+            float(
+                config_entry.options.get(
+                    CONF_MIN_UPDATE_INTERVAL, DEFAULT_MIN_UPDATE_INTERVAL
+                )
+            )
+        )
         self.machine_data = XeniaMachineData.from_dict({})
+        self.shots = XeniaShotPipeline(hass, self)
+        self.phases = XeniaBrewPhaseSegmenter(self)
+        self.target_weight = XeniaTargetWeightPredictor(self)
+        self.shot_index = XeniaShotIndex(self)
+        self.anomalies = XeniaAnomalyDetector(hass, self)
+        self.history = XeniaShotHistory(hass, self)
+        self.curves = XeniaShotCurves(hass, self)
+        self.stream = XeniaShotStream(hass, self)
+        self.eco_policy = XeniaEcoPolicy(hass, self)
+        self.recovery = XeniaRecoveryTracker(self)
+        # Monotonic time the last overview response arrived, used to estimate
+        # how old the data is when listeners process it.
+        self.overview_received: float | None = None
+        # Whether data holds real readings, from the cache or the machine,
+        # rather than the placeholders it starts with.
+        self.has_data = False
+        self._store = async_get_cache_store(hass, config_entry.entry_id)
+        self._last_cache_save = float("-inf")
+
+    async def async_load_cache(self) -> None:
+        """Restore the last known machine info and data from storage."""
+        cached = await self._store.async_load()
+        if not cached:
+            # Nothing known yet, keep entities unavailable until the first refresh.
+            self.last_update_success = False
+            return
+        self.machine_data = XeniaMachineData.from_dict(cached.get("machine", {}))
+        self.has_data = True
+        self.data = XeniaCoordinatorData(
+            XeniaOverviewData.from_dict(cached.get("overview", {})),
+            XeniaOverviewSingleData.from_dict(cached.get("overview_single", {})),
+        )
+        self.target_weight.restore(cached.get("target_weight", {}))
+        self.shot_index.restore(cached.get("shot_index", {}))
+        self.anomalies.restore(cached.get("anomalies", {}))
+        self.eco_policy.restore(cached.get("eco_policy", {}))
+        self.recovery.restore(cached.get("recovery", {}))
+
+    async def async_background_refresh(self) -> None:
+        """Fetch machine info and the first data concurrently."""
+        await asyncio.gather(self._async_refresh_machine_data(), self.async_refresh())
+
+    async def _async_refresh_machine_data(self) -> None:
+        try:
+            machine_data = await self.xenia.get_machine()
+        except (ClientError, TimeoutError, OSError) as err:
+            _LOGGER.debug("Machine info fetch failed: %s", err)
+            return
+        if machine_data == self.machine_data:
+            return
+        self.machine_data = machine_data
+        self.schedule_cache_save(force=True)
+        device_registry = dr.async_get(self.hass)
+        device = device_registry.async_get_device(
+            identifiers={(XENIA_DOMAIN, self.config_entry.data[CONF_HOST])}
+        )
+        if device is not None:
+            device_registry.async_update_device(
+                device.id, sw_version=machine_data.sw_version()
+            )
+
+    def schedule_cache_save(self, force: bool = False) -> None:
+        """Persist the current state, at most once per CACHE_SAVE_INTERVAL."""
+        # Store.async_delay_save debounces, so calling it every tick would
+        # postpone the write forever. Throttle here instead.
+        now = time.monotonic()
+        if not force and now - self._last_cache_save < CACHE_SAVE_INTERVAL:
+            return
+        self._last_cache_save = now
+        self._store.async_delay_save(self._cache_data)
+
+    def _cache_data(self) -> dict[str, Any]:
+        return {
+            "machine": self.machine_data.to_dict(),
+            "overview": self.data.overview.to_dict(),
+            "overview_single": self.data.overview_single.to_dict(),
+            "target_weight": self.target_weight.to_dict(),
+            "shot_index": self.shot_index.to_dict(),
+            "anomalies": self.anomalies.to_dict(),
+            "eco_policy": self.eco_policy.to_dict(),
+            "recovery": self.recovery.to_dict(),
+        }
 
     async def _async_update_data(self) -> XeniaCoordinatorData:
+        self.tuner.min_interval = float(
+            self.config_entry.options.get(
+                CONF_MIN_UPDATE_INTERVAL, DEFAULT_MIN_UPDATE_INTERVAL
+            )
+        )
+        endpoint = "overview"
         try:
+            started = time.monotonic()
             overview = await self.xenia.get_overview()
-            await asyncio.sleep(0.5)
+            self.overview_received = time.monotonic()
+            overview_rtt = self.overview_received - started
+            self.tuner.record(endpoint, overview_rtt)
+            await asyncio.sleep(self.tuner.request_gap())
+            endpoint = "overview_single"
+            started = time.monotonic()
             overview_single = await self.xenia.get_overview_single()
-            return XeniaCoordinatorData(overview, overview_single)
+            single_rtt = time.monotonic() - started
+            self.tuner.record(endpoint, single_rtt)
         except Exception as err:
+            self.tuner.record(endpoint, None)
+            self.tuner.tick_failed()
+            self.update_interval = self.tuner.update_interval
             raise UpdateFailed(f"Xenia fetch failed: {err}") from err
+        # The pause between the requests is ours, only the answers count.
+        self.tuner.tick_succeeded(overview_rtt + single_rtt)
+        self.has_data = True
+        # Picked up when the next tick is scheduled.
+        self.update_interval = self.tuner.update_interval
+        if (
+            overview is self.data.overview
+            and overview_single is self.data.overview_single
+        ):
+            # The client hands back the previous objects for identical bodies.
+            return self.data
+        self.schedule_cache_save()
+        return XeniaCoordinatorData(overview, overview_single)
@@ -0,0 +1,91 @@
+"""On-demand shot curves with a compact encoding."""
+
+from __future__ import annotations
+
+from array import array
+import base64
+from collections import OrderedDict
+from collections.abc import Iterable
+import sys
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant
+
+from .history import iter_shot_history
+from .shot import SHOT_CHANNELS
+
+if TYPE_CHECKING:
+    from .coordinator import XeniaDataUpdateCoordinator
+
+CURVE_ENCODING = "delta-float32-le-base64"
+CACHED_SHOTS = 20
+
+
+def encode_channel(values: Iterable[float]) -> str:
+    """Encode a curve as base64 of little endian float32 deltas.
+
+    The first delta is relative to 0. Deltas are taken against the value the
+    decoder reconstructs, so float32 rounding doesn't add up over the curve;
+    decoders sum them up in double precision.
+    """
+    deltas = array("f")
+    restored = 0.0
+    for value in values:
+        deltas.append(value - restored)
+        restored += deltas[-1]
+    if sys.byteorder != "little":
+        deltas.byteswap()
+    return base64.b64encode(deltas.tobytes()).decode("ascii")
+
+
+def encode_curves(shot: dict[str, Any]) -> dict[str, Any]:
+    """Return the encoded curves of a shot as sent to the frontend."""
+    return {
+        "shot_id": shot["shot_id"],
+        "start_time": shot["start_time"],
+        "samples": len(shot["timestamps"]),
+        "encoding": CURVE_ENCODING,
+        "channels": {
+            channel: encode_channel(shot.get(channel, ()))
+            for channel in SHOT_CHANNELS
+        },
+    }
+
+
+class XeniaShotCurves:
+    """LRU of the encoded curves of requested shots.
+
+    Nothing is kept until a shot is asked for, its curves are then read from
+    the shot history and encoded once.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator: XeniaDataUpdateCoordinator
+    ) -> None:
+        """Initialize the curve cache."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._curves: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    async def async_get(self, shot_id: str) -> dict[str, Any] | None:
+        """Return the encoded curves of a shot, None if it is unknown."""
+        if (curves := self._curves.get(shot_id)) is not None:
+            self._curves.move_to_end(shot_id)
+            return curves
+        # The latest shot may still be waiting to be written.
+        await self.coordinator.history.async_flush()
+        shot = await self.hass.async_add_executor_job(
+            self._load_from_history, shot_id
+        )
+        if shot is None:
+            return None
+        curves = self._curves[shot_id] = encode_curves(shot)
+        while len(self._curves) > CACHED_SHOTS:
+            self._curves.popitem(last=False)
+        return curves
+
+    def _load_from_history(self, shot_id: str) -> dict[str, Any] | None:
+        for shot in iter_shot_history(self.coordinator.history.path):
+            if shot.get("shot_id") == shot_id:
+                return shot
+        return None
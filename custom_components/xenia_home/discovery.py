@@ -0,0 +1,103 @@
+"""LAN discovery for Xenia espresso machines."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import ipaddress
+import logging
+
+from aiohttp import ClientError, ClientSession
+
+from homeassistant.components import network
+from homeassistant.core import HomeAssistant
+
+from .xenia import Xenia
+
+_LOGGER = logging.getLogger(__name__)
+
+DISCOVERY_PROBE_TIMEOUT = 1.5
+DISCOVERY_MAX_IN_FLIGHT = 64
+# Never sweep more than a /24 per adapter, larger networks are cut down to
+# the /24 the adapter itself lives in.
+DISCOVERY_MIN_PREFIX = 24
+
+
+@dataclass(frozen=True)
+class XeniaDiscoveredMachine:
+    """A machine that answered a discovery probe."""
+
+    host: str
+    mac: str
+
+    @property
+    def label(self) -> str:
+        """Return a human readable label for selection lists."""
+        if self.mac:
+            return f"{self.host} ({self.mac})"
+        return self.host
+
+
+def normalize_mac(mac: str | None) -> str:
+    """Normalize a MAC address for comparisons."""
+    if not mac:
+        return ""
+    return mac.replace("-", ":").lower()
+
+
+async def async_probe_host(
+    session: ClientSession, host: str, timeout: float = DISCOVERY_PROBE_TIMEOUT
+) -> XeniaDiscoveredMachine | None:
+    """Probe a single host and return the machine if it is a Xenia."""
+    xenia = Xenia(host, session)
+    try:
+        if await xenia.get_status(timeout) is None:
+            return None
+        overview_single = await xenia.get_overview_single(timeout)
+    except (TimeoutError, ClientError, OSError, ValueError):
+        return None
+    return XeniaDiscoveredMachine(host, normalize_mac(overview_single.ma_mac))
+
+
+async def async_get_scan_networks(
+    hass: HomeAssistant,
+) -> list[ipaddress.IPv4Network]:
+    """Return the local IPv4 networks to sweep."""
+    networks: list[ipaddress.IPv4Network] = []
+    for adapter in await network.async_get_adapters(hass):
+        if not adapter["enabled"]:
+            continue
+        for ip_info in adapter["ipv4"]:
+            prefix = max(ip_info["network_prefix"], DISCOVERY_MIN_PREFIX)
+            net = ipaddress.ip_network(f"{ip_info['address']}/{prefix}", strict=False)
+            if net.is_loopback or net.is_link_local or net in networks:
+                continue
+            networks.append(net)
+    return networks
+
+
+async def async_scan_networks(
+    session: ClientSession,
+    networks: list[ipaddress.IPv4Network],
+    max_in_flight: int = DISCOVERY_MAX_IN_FLIGHT,
+    timeout: float = DISCOVERY_PROBE_TIMEOUT,
+) -> list[XeniaDiscoveredMachine]:
+    """Probe every host of the given networks with bounded concurrency."""
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def _probe(host: str) -> XeniaDiscoveredMachine | None:
+        async with semaphore:
+            return await async_probe_host(session, host, timeout)
+
+    hosts = [str(host) for net in networks for host in net.hosts()]
+    _LOGGER.debug("Scanning %d hosts for Xenia machines", len(hosts))
+    results = await asyncio.gather(*(_probe(host) for host in hosts))
+
+    found: dict[str, XeniaDiscoveredMachine] = {}
+    for machine in results:
+        if machine is None:
+            continue
+        # Machines without a MAC are keyed by host so they are still listed.
+        found.setdefault(machine.mac or machine.host, machine)
+    _LOGGER.debug("Discovery found %d machine(s)", len(found))
+    return list(found.values())
@@ -0,0 +1,337 @@
+"""ECO policy learned from when shots are pulled."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import logging
+import math
+import time
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import ClientError
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_ECO_POLICY,
+    CONF_POWER_ON_BEHAVIOR,
+    DEFAULT_ECO_POLICY,
+    DEFAULT_POWER_ON_BEHAVIOR,
+    PowerOnBehavior,
+)
+from .power import async_get_power_manager
+from .shot import ShotCompleted, ShotEvent
+from .xenia import MachineStatus
+
+if TYPE_CHECKING:
+    from .coordinator import XeniaDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+SLOTS = 7 * 24
+EVALUATE_INTERVAL = timedelta(minutes=1)
+# Weight of the latest week in a slot's shot rate.
+SLOT_ALPHA = 0.25
+# Weeks a slot has to be observed before the policy acts on it.
+MIN_SLOT_OBSERVATIONS = 2
+# A slot is expected to see demand when at least one shot is this likely.
+DEMAND_PROBABILITY = 0.5
+# The machine is woken this long before predicted demand to heat up.
+WARM_UP = timedelta(minutes=20)
+# Minutes the machine has to sit idle before it is sent to ECO.
+IDLE_MINUTES = 20
+# Power draw is learned from energy counter deltas over at least this long,
+# the counter has a coarse resolution.
+POWER_WINDOW_SECONDS = 15 * 60
+POWER_ALPHA = 0.3
+
+
+def _slot(moment: datetime) -> int:
+    return moment.weekday() * 24 + moment.hour
+
+
+def _hour_start(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+@dataclass
+class _EnergyWindow:
+    """Energy counter reading at the start of a status segment."""
+
+    status: MachineStatus
+    energy: float
+    started: float
+
+
+class XeniaEcoPolicy:
+    """Send an idle machine to ECO and wake it ahead of expected shots.
+
+    Shots are counted per hour, from extraction counter deltas and completed
+    shots, and folded into one of 168 weekday/hour slots as an exponentially
+    weighted rate. The rate is the expected number of shots in that hour, so
+    the chance of any shot follows a Poisson distribution. Idle and ECO power
+    draw are learned from the energy counter to estimate the energy saved.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator: XeniaDataUpdateCoordinator
+    ) -> None:
+        """Initialize the policy."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.rates = [0.0] * SLOTS
+        self.observations = [0] * SLOTS
+        # Learned power draw in kW.
+        self.idle_power: float | None = None
+        self.eco_power: float | None = None
+        self.energy_saved = 0.0
+        # Hour currently being counted: start, extraction counter at the
+        # start and completed shots so far.
+        self._hour: datetime | None = None
+        self._hour_extractions: int | None = None
+        self._hour_shots = 0
+        self._status: MachineStatus | None = None
+        self._status_since = time.monotonic()
+        self._last_shot = float("-inf")
+        self._energy: _EnergyWindow | None = None
+        self._eco_by_policy = False
+        self._last_evaluated = time.monotonic()
+        self._listeners: list[Callable[[], None]] = []
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether the policy may control the machine."""
+        return bool(
+            self.coordinator.config_entry.options.get(
+                CONF_ECO_POLICY, DEFAULT_ECO_POLICY
+            )
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the learned state for persistence."""
+        return {
+            "rates": [round(rate, 3) for rate in self.rates],
+            "observations": self.observations,
+            "idle_power": self.idle_power,
+            "eco_power": self.eco_power,
+            "energy_saved": round(self.energy_saved, 4),
+            "hour": self._hour.isoformat() if self._hour else None,
+            "hour_extractions": self._hour_extractions,
+            "hour_shots": self._hour_shots,
+            # Survives a restart while the policy holds the machine in ECO,
+            # otherwise it would never wake it again.
+            "eco_by_policy": self._eco_by_policy,
+        }
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Restore the learned state."""
+        rates = data.get("rates", [])
+        observations = data.get("observations", [])
+        if len(rates) == SLOTS and len(observations) == SLOTS:
+            self.rates = [float(rate) for rate in rates]
+            self.observations = [int(count) for count in observations]
+        self.idle_power = data.get("idle_power")
+        self.eco_power = data.get("eco_power")
+        self.energy_saved = float(data.get("energy_saved", 0.0))
+        self._eco_by_policy = bool(data.get("eco_by_policy", False))
+        if (hour := data.get("hour")) is not None:
+            self._hour = dt_util.parse_datetime(hour)
+            self._hour_extractions = data.get("hour_extractions")
+            self._hour_shots = int(data.get("hour_shots", 0))
+
+    def demand(self, moment: datetime) -> float | None:
+        """Return the chance of at least one shot in the hour of moment.
+
+        None while the slot hasn't been observed often enough.
+        """
+        slot = _slot(moment)
+        if self.observations[slot] < MIN_SLOT_OBSERVATIONS:
+            return None
+        return 1 - math.exp(-self.rates[slot])
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start learning and controlling, returns a stop callback."""
+        unsubscribe = self.coordinator.shots.async_subscribe(self._handle_shot_event)
+        remove_listener = self.coordinator.async_add_listener(
+            self._handle_coordinator_update
+        )
+        cancel_timer = async_track_time_interval(
+            self.hass,
+            self._async_evaluate,
+            EVALUATE_INTERVAL,
+            name=f"{self.coordinator.config_entry.title} ECO policy",
+        )
+
+        @callback
+        def _stop() -> None:
+            unsubscribe()
+            remove_listener()
+            cancel_timer()
+
+        return _stop
+
+    @callback
+    def async_subscribe(self, listener: Callable[[], None]) -> CALLBACK_TYPE:
+        """Subscribe to evaluations, returns an unsubscribe callback."""
+        self._listeners.append(listener)
+
+        @callback
+        def _unsubscribe() -> None:
+            self._listeners.remove(listener)
+
+        return _unsubscribe
+
+    @callback
+    def _handle_shot_event(self, event: ShotEvent) -> None:
+        if isinstance(event, ShotCompleted):
+            self._last_shot = time.monotonic()
+            self._roll_hour(dt_util.now())
+            self._hour_shots += 1
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        if not self.coordinator.last_update_success:
+            return
+        overview = self.coordinator.data.overview
+        if overview.ma_status != self._status:
+            self._status = overview.ma_status
+            self._status_since = time.monotonic()
+            self._energy = None
+            if overview.ma_status != MachineStatus.ECO:
+                self._eco_by_policy = False
+        self._learn_power()
+        self._roll_hour(dt_util.now())
+
+    def _roll_hour(self, now: datetime) -> None:
+        """Fold the counted hour into its slot once a new hour started."""
+        hour = _hour_start(now)
+        extractions = self.coordinator.data.overview.ma_extractions or None
+        if self._hour == hour:
+            if self._hour_extractions is None:
+                self._hour_extractions = extractions
+            return
+        if self._hour is not None and hour - self._hour == timedelta(hours=1):
+            shots = self._hour_shots
+            if extractions is not None and self._hour_extractions is not None:
+                # The counter also sees shots too short for the pipeline.
+                shots = max(shots, extractions - self._hour_extractions)
+            slot = _slot(self._hour)
+            self.rates[slot] += SLOT_ALPHA * (shots - self.rates[slot])
+            self.observations[slot] = min(self.observations[slot] + 1, 255)
+            self.coordinator.schedule_cache_save(force=True)
+        # After a gap the first hour is partial, counting starts anew.
+        self._hour = hour
+        self._hour_extractions = extractions
+        self._hour_shots = 0
+
+    def _learn_power(self) -> None:
+        overview = self.coordinator.data.overview
+        status = overview.ma_status
+        if status not in (MachineStatus.ON, MachineStatus.ECO):
+            return
+        now = time.monotonic()
+        if self._energy is None:
+            self._energy = _EnergyWindow(status, overview.ma_energy_total_kwh, now)
+            return
+        elapsed = now - self._energy.started
+        if elapsed < POWER_WINDOW_SECONDS:
+            return
+        if status == MachineStatus.ON and now - self._last_shot < elapsed:
+            # Shots heat up the boilers, only quiet windows are idle draw.
+            self._energy = _EnergyWindow(status, overview.ma_energy_total_kwh, now)
+            return
+        power = (overview.ma_energy_total_kwh - self._energy.energy) * 3600 / elapsed
+        if power >= 0:
+            if status == MachineStatus.ON:
+                self.idle_power = _ema(self.idle_power, power)
+            else:
+                self.eco_power = _ema(self.eco_power, power)
+        self._energy = _EnergyWindow(status, overview.ma_energy_total_kwh, now)
+
+    async def _async_evaluate(self, _now: datetime) -> None:
+        now = time.monotonic()
+        elapsed, self._last_evaluated = now - self._last_evaluated, now
+        if not self.coordinator.last_update_success:
+            return
+        status = self.coordinator.data.overview.ma_status
+        if (
+            self._eco_by_policy
+            and status == MachineStatus.ECO
+            and self.idle_power is not None
+            and self.eco_power is not None
+        ):
+            saved = max(self.idle_power - self.eco_power, 0.0) * elapsed / 3600
+            self.energy_saved += saved
+        for listener in list(self._listeners):
+            listener()
+        if not self.enabled:
+            return
+
+        local_now = dt_util.now()
+        try:
+            expected = self._demand_expected(local_now)
+            # Only an ECO the policy entered itself is left again, not one
+            # the user chose.
+            if status == MachineStatus.ECO and self._eco_by_policy and expected:
+                await self._async_wake()
+            elif (
+                status == MachineStatus.ON
+                and expected is False
+                and min(now - self._status_since, now - self._last_shot)
+                >= IDLE_MINUTES * 60
+            ):
+                await self._async_set_eco()
+        except (ClientError, TimeoutError, OSError) as err:
+            _LOGGER.warning(
+                "ECO policy for %s failed: %s",
+                self.coordinator.config_entry.title,
+                err,
+            )
+
+    def _demand_expected(self, now: datetime) -> bool | None:
+        """Return whether shots are expected now or within the warm up time.
+
+        None if that depends on a slot that hasn't been learned yet, the
+        policy doesn't act on a guess in either direction.
+        """
+        demands = [self.demand(now), self.demand(now + WARM_UP)]
+        if any(d is not None and d >= DEMAND_PROBABILITY for d in demands):
+            return True
+        if None in demands:
+            return None
+        return False
+
+    async def _async_set_eco(self) -> None:
+        _LOGGER.info(
+            "Sending %s to ECO, no shots expected", self.coordinator.config_entry.title
+        )
+        async_get_power_manager(self.hass).async_cancel(self.coordinator)
+        await self.coordinator.xenia.machine_set_eco()
+        self._eco_by_policy = True
+        self.coordinator.schedule_cache_save(force=True)
+        await self.coordinator.async_request_refresh()
+
+    async def _async_wake(self) -> None:
+        _LOGGER.info(
+            "Waking %s from ECO ahead of expected shots",
+            self.coordinator.config_entry.title,
+        )
+        behavior = self.coordinator.config_entry.options.get(
+            CONF_POWER_ON_BEHAVIOR, DEFAULT_POWER_ON_BEHAVIOR
+        )
+        await async_get_power_manager(self.hass).async_turn_on(
+            self.coordinator, behavior == PowerOnBehavior.STEAM_ON
+        )
+        self._eco_by_policy = False
+        await self.coordinator.async_request_refresh()
+
+
+def _ema(current: float | None, value: float) -> float:
+    if current is None:
+        return value
+    return current + POWER_ALPHA * (value - current)
@@ -20,18 +20,10 @@ class XeniaEntity(CoordinatorEntity[XeniaDataUpdateCoordinator]):
     @property
     def device_info(self) -> DeviceInfo:
         """Return device information about this Xenia espresso machine."""
-        machine = self.coordinator.machine_data
-        fw_version = machine.fw_version()
-        esp_fw_version = machine.esp_fw_version()
-        sw_version = (
-            f"{fw_version}/{esp_fw_version}"
-            if fw_version and esp_fw_version
-            else None
-        )
         return DeviceInfo(
             identifiers={(XENIA_DOMAIN, self.coordinator.config_entry.data[CONF_HOST])},
             name="Xenia Espresso Machine",
             manufacturer="Xenia Espresso GmbH",
             model="DBL",
-            sw_version=sw_version,
+            sw_version=self.coordinator.machine_data.sw_version(),
         )
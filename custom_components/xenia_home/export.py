@@ -0,0 +1,216 @@
+"""Streaming export of the shot history."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+import csv
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from enum import StrEnum
+import json
+import os
+import shutil
+import tempfile
+from typing import IO, Any
+
+from .history import iter_shot_history
+
+# Progress is reported every this many shots.
+PROGRESS_CHUNK_SHOTS = 50
+# Temporary files are private, a new export gets the usual file mode so other
+# readers (e.g. a Samba share) can open it.
+EXPORT_FILE_MODE = 0o644
+
+# Per sample columns of the CSV and columnar formats and the shot fields
+# holding them.
+SAMPLE_COLUMNS: tuple[tuple[str, str], ...] = (
+    ("t", "timestamps"),
+    ("brew_group_temp", "brew_group_temps"),
+    ("brew_boiler_temp", "brew_boiler_temps"),
+    ("pump_pressure", "pump_pressures"),
+    ("flow_rate", "flow_rates"),
+    ("weight", "weights"),
+)
+SHOT_COLUMNS = ("machine", "start_time")
+
+
+class ExportFormat(StrEnum):
+    """Output format of a shot export."""
+
+    CSV = "csv"
+    NDJSON = "ndjson"
+    # One JSON array per column, samples of all shots concatenated.
+    COLUMNAR = "columnar"
+
+
+@dataclass(frozen=True)
+class ShotSource:
+    """Shot history file of one machine."""
+
+    machine: str
+    path: str
+
+
+@dataclass
+class ExportProgress:
+    """Progress of a running export."""
+
+    path: str
+    shots: int = 0
+    samples: int = 0
+    done: bool = False
+    sources: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return asdict(self)
+
+
+def _in_range(
+    shot: dict[str, Any], start: datetime | None, end: datetime | None
+) -> bool:
+    if start is None and end is None:
+        return True
+    try:
+        start_time = datetime.fromisoformat(shot["start_time"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return (start is None or start_time >= start) and (
+        end is None or start_time < end
+    )
+
+
+class _Writer(ABC):
+    """Write shots one at a time to an open text file."""
+
+    def __init__(self, file: IO[str]) -> None:
+        self.file = file
+
+    @abstractmethod
+    def write(self, machine: str, shot: dict[str, Any]) -> int:
+        """Write one shot and return its number of samples."""
+
+    def close(self) -> None:
+        """Finish the output, nothing to do for formats without a trailer."""
+
+
+class _CsvWriter(_Writer):
+    def __init__(self, file: IO[str]) -> None:
+        super().__init__(file)
+        self._csv = csv.writer(file)
+        self._csv.writerow([*SHOT_COLUMNS, *(name for name, _ in SAMPLE_COLUMNS)])
+
+    def write(self, machine: str, shot: dict[str, Any]) -> int:
+        rows = zip(*(shot[key] for _, key in SAMPLE_COLUMNS), strict=False)
+        start_time = shot["start_time"]
+        count = 0
+        for row in rows:
+            self._csv.writerow([machine, start_time, *row])
+            count += 1
+        return count
+
+
+class _NdjsonWriter(_Writer):
+    def write(self, machine: str, shot: dict[str, Any]) -> int:
+        self.file.write(json.dumps({"machine": machine, **shot}))
+        self.file.write("\n")
+        return len(shot["timestamps"])
+
+
+class _ColumnarWriter(_Writer):
+    """Spool every column to its own temporary file, joined on close.
+
+    This keeps memory constant, the columns can't be written to the output
+    directly as all values of one column have to be adjacent.
+    """
+
+    def __init__(self, file: IO[str]) -> None:
+        super().__init__(file)
+        self._columns = [*SHOT_COLUMNS, *(name for name, _ in SAMPLE_COLUMNS)]
+        self._spools = [
+            tempfile.TemporaryFile("w+", encoding="utf-8") for _ in self._columns
+        ]
+        self._empty = True
+
+    def write(self, machine: str, shot: dict[str, Any]) -> int:
+        rows = list(zip(*(shot[key] for _, key in SAMPLE_COLUMNS), strict=False))
+        if not rows:
+            return 0
+        prefix = "" if self._empty else ","
+        self._empty = False
+        columns = (
+            [json.dumps(machine)] * len(rows),
+            [json.dumps(shot["start_time"])] * len(rows),
+            *([json.dumps(v) for v in column] for column in zip(*rows, strict=True)),
+        )
+        for spool, values in zip(self._spools, columns, strict=True):
+            spool.write(prefix + ",".join(values))
+        return len(rows)
+
+    def close(self) -> None:
+        self.file.write("{")
+        for index, (name, spool) in enumerate(
+            zip(self._columns, self._spools, strict=True)
+        ):
+            if index:
+                self.file.write(",")
+            self.file.write(f"{json.dumps(name)}:[")
+            spool.seek(0)
+            shutil.copyfileobj(spool, self.file)
+            spool.close()
+            self.file.write("]")
+        self.file.write("}\n")
+
+
+_WRITERS: dict[ExportFormat, Callable[[IO[str]], _Writer]] = {
+    ExportFormat.CSV: _CsvWriter,
+    ExportFormat.NDJSON: _NdjsonWriter,
+    ExportFormat.COLUMNAR: _ColumnarWriter,
+}
+
+
+def export_shots(
+    sources: Iterable[ShotSource],
+    path: str,
+    export_format: ExportFormat,
+    start: datetime | None,
+    end: datetime | None,
+    progress_callback: Callable[[ExportProgress], None],
+) -> ExportProgress:
+    """Stream the shots of all sources within [start, end) into path.
+
+    Blocking, run it in the executor. Only one shot is held in memory at a
+    time. The output is written to a temporary file that replaces path once
+    complete, so a failed export doesn't leave a truncated file behind.
+    """
+    progress = ExportProgress(path=path)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", newline="", dir=directory, delete=False
+    ) as file:
+        try:
+            writer = _WRITERS[export_format](file)
+            for source in sources:
+                progress.sources.append(source.machine)
+                for shot in iter_shot_history(source.path):
+                    if not _in_range(shot, start, end):
+                        continue
+                    progress.samples += writer.write(source.machine, shot)
+                    progress.shots += 1
+                    if progress.shots % PROGRESS_CHUNK_SHOTS == 0:
+                        progress_callback(progress)
+            writer.close()
+        except BaseException:
+            os.unlink(file.name)
+            raise
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = EXPORT_FILE_MODE
+    os.chmod(file.name, mode)
+    os.replace(file.name, path)
+    progress.done = True
+    progress_callback(progress)
+    return progress
@@ -0,0 +1,113 @@
+"""Append-only history of completed shots."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator
+import logging
+import os
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.json import json_bytes
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util.json import JSON_DECODE_EXCEPTIONS, json_loads_object
+
+from .const import XENIA_DOMAIN
+from .shot import ShotCompleted, ShotEvent
+
+if TYPE_CHECKING:
+    from .coordinator import XeniaDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def shot_history_path(hass: HomeAssistant, entry_id: str) -> str:
+    """Return the path of the shot history file of a config entry."""
+    return hass.config.path(STORAGE_DIR, f"{XENIA_DOMAIN}.{entry_id}.shots")
+
+
+def iter_shot_history(path: str) -> Iterator[dict[str, Any]]:
+    """Yield the shots of a history file one at a time.
+
+    Blocking, run it in the executor.
+    """
+    try:
+        file = open(path, "rb")  # noqa: SIM115
+    except FileNotFoundError:
+        return
+    with file:
+        for line in file:
+            try:
+                yield json_loads_object(line)
+            except JSON_DECODE_EXCEPTIONS:
+                # A line that is still being appended or was cut off by a crash.
+                _LOGGER.debug("Skipping incomplete line in %s", path)
+
+
+class XeniaShotHistory:
+    """Append completed shots as NDJSON lines to a per entry file.
+
+    Shots are kept out of the recorder, their curves exceed the attribute size
+    it is willing to store, and a line based file can be read back in constant
+    memory.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator: XeniaDataUpdateCoordinator
+    ) -> None:
+        """Initialize the shot history."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.path = shot_history_path(hass, coordinator.config_entry.entry_id)
+        self._pending: list[bytes] = []
+        self._flush_task: asyncio.Task[None] | None = None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start following the shot pipeline, returns a stop callback."""
+        return self.coordinator.shots.async_subscribe(self._handle_shot_event)
+
+    @callback
+    def _handle_shot_event(self, event: ShotEvent) -> None:
+        if not isinstance(event, ShotCompleted):
+            return
+        self._pending.append(json_bytes(event.shot.to_dict()) + b"\n")
+        if self._flush_task is None:
+            entry = self.coordinator.config_entry
+            self._flush_task = entry.async_create_background_task(
+                self.hass, self._async_flush(), f"{XENIA_DOMAIN}_shot_history"
+            )
+
+    async def _async_flush(self) -> None:
+        # A single writer keeps the lines in order.
+        try:
+            while self._pending:
+                lines, self._pending = self._pending, []
+                await self.hass.async_add_executor_job(self._write, lines)
+        except OSError as err:
+            _LOGGER.error("Failed to write shot history %s: %s", self.path, err)
+        finally:
+            self._flush_task = None
+
+    def _write(self, lines: list[bytes]) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "ab") as file:
+            file.writelines(lines)
+
+    async def async_flush(self) -> None:
+        """Wait until all completed shots are written."""
+        if self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+
+
+async def async_remove_shot_history(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete the shot history of a removed config entry."""
+
+    def _remove() -> None:
+        try:
+            os.remove(shot_history_path(hass, entry_id))
+        except FileNotFoundError:
+            pass
+
+    await hass.async_add_executor_job(_remove)
@@ -0,0 +1,174 @@
+"""Machine profiles applied with as few commands as possible."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict, dataclass, replace
+from enum import StrEnum
+import logging
+from typing import TYPE_CHECKING, Any
+
+from .power import PowerRequestKind, async_get_power_manager
+from .xenia import MachineStatus, SteamBoilerStatus
+
+if TYPE_CHECKING:
+    from .coordinator import XeniaCoordinatorData, XeniaDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Setpoints closer than this to the target are left alone, the machine
+# works in 0.5 °C steps.
+SETPOINT_TOLERANCE = 0.25
+# Same settle time the switches give the machine before reading it back.
+CONFIRM_DELAY = 1.0
+
+_ON_STATES = (MachineStatus.ON, MachineStatus.BREWING, MachineStatus.DRAINING)
+
+
+class MachinePower(StrEnum):
+    """Target power state of a profile."""
+
+    OFF = "off"
+    ECO = "eco"
+    ON = "on"
+
+
+class ProfileCommand(StrEnum):
+    """Command sent to the machine while applying a profile."""
+
+    SET_BG_SET_TEMP = "set_bg_set_temp"
+    SET_BB_SET_TEMP = "set_bb_set_temp"
+    TURN_ON = "turn_on"
+    TURN_ON_SB_OFF = "turn_on_sb_off"
+    SET_ECO = "set_eco"
+    TURN_OFF = "turn_off"
+    SB_TURN_ON = "sb_turn_on"
+    SB_TURN_OFF = "sb_turn_off"
+
+
+@dataclass(frozen=True)
+class XeniaMachineProfile:
+    """Target state of a machine, None leaves a setting as it is."""
+
+    power: MachinePower | None = None
+    steam_boiler: bool | None = None
+    bg_set_temp: float | None = None
+    bb_set_temp: float | None = None
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> XeniaMachineProfile:
+        power = data.get("power")
+        return XeniaMachineProfile(
+            power=MachinePower(power) if power is not None else None,
+            steam_boiler=data.get("steam_boiler"),
+            bg_set_temp=data.get("bg_set_temp"),
+            bb_set_temp=data.get("bb_set_temp"),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary, leaving out unset settings."""
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+    def merge(self, other: XeniaMachineProfile) -> XeniaMachineProfile:
+        """Return this profile with the settings other sets overridden."""
+        return replace(self, **other.to_dict())
+
+    def plan(self, data: XeniaCoordinatorData) -> list[ProfileCommand]:
+        """Return the commands that take the machine from data to this profile.
+
+        Setpoints go first, so boilers that are switched on heat straight to
+        the new target. Turning the machine on switches the steam boiler in
+        the same command.
+        """
+        commands: list[ProfileCommand] = []
+        current = data.overview_single
+        bg_changed = self.bg_set_temp is not None and (
+            abs(current.bg_set_temp - self.bg_set_temp) > SETPOINT_TOLERANCE
+        )
+        if bg_changed:
+            commands.append(ProfileCommand.SET_BG_SET_TEMP)
+        # inc_dec carries BB_SET_TEMP as well, so the brew boiler setpoint is
+        # sent again after a brew group change, the current one if the profile
+        # leaves it as it is.
+        if bg_changed or (
+            self.bb_set_temp is not None
+            and abs(current.bb_set_temp - self.bb_set_temp) > SETPOINT_TOLERANCE
+        ):
+            commands.append(ProfileCommand.SET_BB_SET_TEMP)
+
+        status = data.overview.ma_status
+        is_on = status in _ON_STATES
+        steam_on = data.overview.sb_status == SteamBoilerStatus.ON
+        if self.power is MachinePower.OFF:
+            if status != MachineStatus.OFF:
+                commands.append(ProfileCommand.TURN_OFF)
+            return commands
+        if self.power is MachinePower.ECO:
+            if status != MachineStatus.ECO:
+                commands.append(ProfileCommand.SET_ECO)
+            return commands
+        if self.power is MachinePower.ON and not is_on:
+            steam = self.steam_boiler if self.steam_boiler is not None else steam_on
+            commands.append(
+                ProfileCommand.TURN_ON if steam else ProfileCommand.TURN_ON_SB_OFF
+            )
+            return commands
+        if is_on and self.steam_boiler is not None and self.steam_boiler != steam_on:
+            commands.append(
+                ProfileCommand.SB_TURN_ON
+                if self.steam_boiler
+                else ProfileCommand.SB_TURN_OFF
+            )
+        return commands
+
+
+async def async_apply_profile(
+    coordinator: XeniaDataUpdateCoordinator, profile: XeniaMachineProfile
+) -> list[ProfileCommand]:
+    """Send the commands needed to reach profile, returns the commands sent.
+
+    The result is confirmed with a single refresh instead of one per command.
+    """
+    commands = profile.plan(coordinator.data)
+    # Read before any command is sent, a brew group change can clobber it.
+    bb_set_temp = (
+        profile.bb_set_temp
+        if profile.bb_set_temp is not None
+        else coordinator.data.overview_single.bb_set_temp
+    )
+    _LOGGER.debug(
+        "Applying %s to %s: %s",
+        profile,
+        coordinator.config_entry.title,
+        [str(command) for command in commands] or "nothing to do",
+    )
+    if not commands:
+        return commands
+
+    xenia = coordinator.xenia
+    power_manager = async_get_power_manager(coordinator.hass)
+    for command in commands:
+        if command is ProfileCommand.SET_BG_SET_TEMP:
+            assert profile.bg_set_temp is not None
+            await xenia.set_bg_set_temp(profile.bg_set_temp)
+        elif command is ProfileCommand.SET_BB_SET_TEMP:
+            await xenia.set_bb_set_temp(bb_set_temp)
+        elif command is ProfileCommand.TURN_ON:
+            await power_manager.async_turn_on(coordinator)
+        elif command is ProfileCommand.TURN_ON_SB_OFF:
+            await power_manager.async_turn_on(coordinator, False)
+        elif command is ProfileCommand.SET_ECO:
+            power_manager.async_cancel(coordinator)
+            await xenia.machine_set_eco()
+        elif command is ProfileCommand.TURN_OFF:
+            power_manager.async_cancel(coordinator)
+            await xenia.machine_turn_off()
+        elif command is ProfileCommand.SB_TURN_ON:
+            await power_manager.async_sb_turn_on(coordinator)
+        elif command is ProfileCommand.SB_TURN_OFF:
+            power_manager.async_cancel(coordinator, PowerRequestKind.STEAM_BOILER)
+            await xenia.sb_turn_off()
+
+    await asyncio.sleep(CONFIRM_DELAY)
+    await coordinator.async_request_refresh()
+    return commands
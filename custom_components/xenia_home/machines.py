@@ -0,0 +1,160 @@
+"""One coordinator per physical machine, keyed by its MAC address."""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+from homeassistant.const import CONF_HOST, CONF_MAC
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.util.hass_dict import HassKey
+
+from .const import XENIA_DOMAIN
+from .discovery import normalize_mac
+
+if TYPE_CHECKING:
+    from .coordinator import XeniaConfigEntry, XeniaDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_MACHINES: HassKey[dict[str, XeniaDataUpdateCoordinator]] = HassKey(
+    f"{XENIA_DOMAIN}_machines"
+)
+
+
+@callback
+def async_get_machine(
+    hass: HomeAssistant, mac: str | None
+) -> XeniaDataUpdateCoordinator | None:
+    """Return the coordinator already polling the machine with this MAC."""
+    if not (mac := normalize_mac(mac)):
+        return None
+    return hass.data.get(DATA_MACHINES, {}).get(mac)
+
+
+@callback
+def async_register_machine(
+    hass: HomeAssistant, mac: str, coordinator: XeniaDataUpdateCoordinator
+) -> CALLBACK_TYPE:
+    """Register the coordinator of a machine, returns a callback to unregister.
+
+    Entries that were set up as aliases of the coordinator are reloaded once
+    it goes away, so one of them takes over polling.
+    """
+    mac = normalize_mac(mac)
+    machines = hass.data.setdefault(DATA_MACHINES, {})
+    machines[mac] = coordinator
+
+    @callback
+    def _unregister() -> None:
+        if machines.get(mac) is coordinator:
+            del machines[mac]
+        for entry in hass.config_entries.async_loaded_entries(XENIA_DOMAIN):
+            if entry.runtime_data is coordinator and not is_machine_owner(entry):
+                hass.config_entries.async_schedule_reload(entry.entry_id)
+
+    return _unregister
+
+
+@callback
+def async_track_machine(
+    hass: HomeAssistant,
+    entry: XeniaConfigEntry,
+    coordinator: XeniaDataUpdateCoordinator,
+) -> CALLBACK_TYPE:
+    """Register the machine of entry once its MAC is known, returns a stop callback.
+
+    Without a cached or configured MAC it is learned from the first data. If
+    another entry turns out to poll the same machine, the entry is reloaded to
+    become its alias.
+    """
+    unregister: CALLBACK_TYPE | None = None
+    remove_listener: CALLBACK_TYPE | None = None
+
+    @callback
+    def _async_check() -> None:
+        nonlocal unregister, remove_listener
+        mac = normalize_mac(
+            coordinator.data.overview_single.ma_mac or entry.data.get(CONF_MAC)
+        )
+        if not mac:
+            return
+        if remove_listener is not None:
+            remove_listener()
+            remove_listener = None
+        if CONF_MAC not in entry.data:
+            hass.config_entries.async_update_entry(
+                entry, data={**entry.data, CONF_MAC: mac}
+            )
+        if async_get_machine(hass, mac) is not None:
+            hass.config_entries.async_schedule_reload(entry.entry_id)
+            return
+        unregister = async_register_machine(hass, mac, coordinator)
+
+    remove_listener = coordinator.async_add_listener(_async_check)
+    _async_check()
+
+    @callback
+    def _stop() -> None:
+        if remove_listener is not None:
+            remove_listener()
+        if unregister is not None:
+            unregister()
+
+    return _stop
+
+
+def is_machine_owner(entry: XeniaConfigEntry) -> bool:
+    """Return whether the entry polls its machine, rather than being an alias."""
+    return entry.runtime_data.config_entry is entry
+
+
+@callback
+def async_loaded_machines(hass: HomeAssistant) -> list[XeniaConfigEntry]:
+    """Return the loaded entries that poll a machine, one per machine."""
+    return [
+        entry
+        for entry in hass.config_entries.async_loaded_entries(XENIA_DOMAIN)
+        if is_machine_owner(entry)
+    ]
+
+
+@callback
+def async_setup_alias(
+    hass: HomeAssistant,
+    entry: XeniaConfigEntry,
+    coordinator: XeniaDataUpdateCoordinator,
+) -> CALLBACK_TYPE:
+    """Share the coordinator of another entry for the same machine.
+
+    The alias gets no entities of its own, they would duplicate those of the
+    owning entry. A repair issue asks to remove it.
+    """
+    owner = coordinator.config_entry
+    _LOGGER.warning(
+        "%s is the same machine as %s, sharing its connection",
+        entry.title,
+        owner.title,
+    )
+    entry.runtime_data = coordinator
+    issue_id = f"duplicate_machine_{entry.entry_id}"
+    ir.async_create_issue(
+        hass,
+        XENIA_DOMAIN,
+        issue_id,
+        is_fixable=False,
+        severity=ir.IssueSeverity.WARNING,
+        translation_key="duplicate_machine",
+        translation_placeholders={
+            "name": entry.title,
+            "host": entry.data[CONF_HOST],
+            "owner": owner.title,
+        },
+    )
+
+    @callback
+    def _remove() -> None:
+        ir.async_delete_issue(hass, XENIA_DOMAIN, issue_id)
+
+    return _remove
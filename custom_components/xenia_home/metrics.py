@@ -0,0 +1,175 @@
+"""OpenMetrics exposition of the latest machine data."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import fields
+from enum import IntEnum
+from http import HTTPStatus
+import time
+from typing import Any
+
+from aiohttp import web
+
+from homeassistant.components.http import KEY_HASS, HomeAssistantView
+from homeassistant.const import CONF_HOST
+
+from .const import XENIA_DOMAIN
+from .coordinator import XeniaConfigEntry, XeniaDataUpdateCoordinator
+from .machines import async_loaded_machines
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+METRIC_PREFIX = "xenia"
+# Fields that only ever increase, exported as counters.
+COUNTER_FIELDS = frozenset(
+    {"ma_extractions", "ma_operating_hours", "ma_energy_total_kwh"}
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict[str, str]) -> str:
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _number(value: Any) -> float | None:
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, IntEnum):
+        return float(int(value))
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+class _Family:
+    """Samples of one metric family across all machines."""
+
+    def __init__(self, name: str, metric_type: str, help_text: str) -> None:
+        self.name = name
+        self.type = metric_type
+        self.help = help_text
+        self.samples: list[str] = []
+
+    def add(self, labels: dict[str, str], value: float, suffix: str = "") -> None:
+        self.samples.append(f"{self.name}{suffix}{{{_labels(labels)}}} {value!r}")
+
+    def render(self) -> list[str]:
+        return [
+            f"# TYPE {self.name} {self.type}",
+            f"# HELP {self.name} {self.help}",
+            *self.samples,
+        ]
+
+
+class XeniaMetricsView(HomeAssistantView):
+    """Serve the last known data of all machines in OpenMetrics format.
+
+    Everything is rendered from what the coordinators already hold, a scrape
+    never causes a request to a machine.
+    """
+
+    url = f"/api/{XENIA_DOMAIN}/metrics"
+    name = f"api:{XENIA_DOMAIN}:metrics"
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Render the metrics."""
+        hass = request.app[KEY_HASS]
+        return web.Response(
+            status=HTTPStatus.OK,
+            body=render_metrics(async_loaded_machines(hass)).encode(),
+            headers={"Content-Type": CONTENT_TYPE},
+        )
+
+
+def render_metrics(entries: list[XeniaConfigEntry]) -> str:
+    """Return the OpenMetrics text of the given machines."""
+    families: dict[str, _Family] = {}
+
+    def family(name: str, metric_type: str, help_text: str) -> _Family:
+        if (existing := families.get(name)) is None:
+            existing = families[name] = _Family(
+                f"{METRIC_PREFIX}_{name}", metric_type, help_text
+            )
+        return existing
+
+    now = time.monotonic()
+    for entry in entries:
+        coordinator = entry.runtime_data
+        labels = {"machine": entry.title, "host": entry.data[CONF_HOST]}
+        family("up", "gauge", "Whether the last poll succeeded.").add(
+            labels, float(coordinator.last_update_success)
+        )
+        if coordinator.overview_received is not None:
+            family(
+                "data_age_seconds", "gauge", "Age of the last overview response."
+            ).add(labels, round(now - coordinator.overview_received, 3))
+        if coordinator.has_data:
+            # Before the first response the fields are placeholders, up and
+            # data_age_seconds tell a scraper there is nothing yet.
+            _add_data_metrics(family, labels, coordinator)
+        family("poll_rate_hertz", "gauge", "Effective poll rate.").add(
+            labels, round(coordinator.tuner.rate, 4)
+        )
+        _add_client_metrics(family, labels, coordinator)
+
+    lines = [line for item in families.values() for line in item.render()]
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def _add_data_metrics(
+    family: Callable[[str, str, str], _Family],
+    labels: dict[str, str],
+    coordinator: XeniaDataUpdateCoordinator,
+) -> None:
+    for data in (coordinator.data.overview, coordinator.data.overview_single):
+        for data_field in fields(data):
+            value = _number(getattr(data, data_field.name))
+            if value is None:
+                continue
+            help_text = f"Last {data_field.name.upper()} reported by the machine."
+            if data_field.name in COUNTER_FIELDS:
+                family(data_field.name, "counter", help_text).add(
+                    labels, value, "_total"
+                )
+            else:
+                family(data_field.name, "gauge", help_text).add(labels, value)
+    if mac := coordinator.data.overview_single.ma_mac:
+        family("machine", "info", "Machine identification.").add(
+            {**labels, "mac": mac}, 1.0, "_info"
+        )
+
+
+def _add_client_metrics(
+    family: Callable[[str, str, str], _Family],
+    labels: dict[str, str],
+    coordinator: XeniaDataUpdateCoordinator,
+) -> None:
+    for endpoint, latency in coordinator.tuner.endpoints.items():
+        endpoint_labels = {**labels, "endpoint": endpoint}
+        duration = family(
+            "client_request_duration_seconds",
+            "summary",
+            "Round trip time of successful requests.",
+        )
+        duration.add(
+            endpoint_labels, float(latency.requests - latency.errors), "_count"
+        )
+        duration.add(endpoint_labels, round(latency.rtt_sum, 6), "_sum")
+        if (p95 := latency.p95) is not None:
+            duration.add({**endpoint_labels, "quantile": "0.95"}, round(p95, 6))
+        family("client_requests", "counter", "Requests sent to the machine.").add(
+            endpoint_labels, float(latency.requests), "_total"
+        )
+        family(
+            "client_request_errors", "counter", "Requests that failed or timed out."
+        ).add(endpoint_labels, float(latency.errors), "_total")
+        if (stats := coordinator.xenia.stats.get(endpoint)) is not None:
+            family(
+                "client_unchanged_responses",
+                "counter",
+                "Responses identical to the previous one.",
+            ).add(endpoint_labels, float(stats.unchanged), "_total")
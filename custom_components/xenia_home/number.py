@@ -8,12 +8,19 @@ from homeassistant.components.number import (
     NumberDeviceClass,
     NumberEntity,
     NumberEntityDescription,
+    NumberMode,
+)
+from homeassistant.const import (
+    CONF_HOST,
+    EntityCategory,
+    UnitOfMass,
+    UnitOfTemperature,
 )
-from homeassistant.const import CONF_HOST, EntityCategory, UnitOfTemperature
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
 
+from .const import CONF_TARGET_WEIGHT, DEFAULT_TARGET_WEIGHT, XENIA_DOMAIN
 from .coordinator import (
     XeniaConfigEntry,
     XeniaCoordinatorData,
@@ -74,6 +81,7 @@ async def async_setup_entry(
     async_add_entities(
         XeniaNumber(coordinator, description) for description in NUMBER_TYPES
     )
+    async_add_entities([XeniaTargetWeightNumber(coordinator, entry)])
 
 
 class XeniaNumber(XeniaEntity, NumberEntity):
@@ -106,3 +114,40 @@ class XeniaNumber(XeniaEntity, NumberEntity):
             await self.entity_description.set_fn(self.coordinator, float(value))
         finally:
             await self.coordinator.async_request_refresh()
+
+
+class XeniaTargetWeightNumber(XeniaEntity, NumberEntity):
+    _attr_entity_category = EntityCategory.CONFIG
+    _attr_device_class = NumberDeviceClass.WEIGHT
+    _attr_native_unit_of_measurement = UnitOfMass.GRAMS
+    _attr_native_min_value = 0
+    _attr_native_max_value = 500
+    _attr_native_step = 0.5
+    _attr_mode = NumberMode.BOX
+
+    def __init__(
+        self,
+        coordinator: XeniaDataUpdateCoordinator,
+        entry: XeniaConfigEntry,
+    ) -> None:
+        super().__init__(coordinator)
+        self._entry_id = entry.entry_id
+        self._attr_translation_key = "target_weight"
+        self._attr_unique_id = f"{XENIA_DOMAIN}_target_weight_{self.coordinator.config_entry.data[CONF_HOST]}"
+        self._attr_icon = "mdi:scale"
+
+    @property
+    def native_value(self) -> float:
+        return float(
+            self.coordinator.config_entry.options.get(
+                CONF_TARGET_WEIGHT, DEFAULT_TARGET_WEIGHT
+            )
+        )
+
+    async def async_set_native_value(self, value: float) -> None:
+        new_opts = dict(self.coordinator.config_entry.options)
+        new_opts[CONF_TARGET_WEIGHT] = float(value)
+        self.hass.config_entries.async_update_entry(
+            self.coordinator.config_entry, options=new_opts
+        )
+        self.async_write_ha_state()
@@ -0,0 +1,207 @@
+"""Online segmentation of shots into brew phases."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from enum import StrEnum
+import logging
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, callback
+
+from .shot import (
+    CleaningCycle,
+    ShotAborted,
+    ShotBuffer,
+    ShotCompleted,
+    ShotDiscarded,
+    ShotEvent,
+    ShotSampleAdded,
+    ShotStarted,
+)
+
+if TYPE_CHECKING:
+    from .coordinator import XeniaDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Smoothing of the per sample slopes.
+SLOPE_ALPHA = 0.5
+# Preinfusion soaks the puck below this pressure.
+PREINFUSION_MAX_BAR = 3.0
+# Pressure rising faster than this is the ramp up to extraction pressure.
+RAMP_SLOPE_BAR_PER_S = 1.0
+# Extraction starts once pressure levels off or coffee reaches the cup.
+PLATEAU_SLOPE_BAR_PER_S = 0.5
+EXTRACTION_FLOW_G_PER_S = 0.5
+# The decline starts once pressure falls this far below the extraction peak.
+DECLINE_PEAK_RATIO = 0.8
+DECLINE_SLOPE_BAR_PER_S = -0.5
+# Samples a transition condition has to hold, so a single noisy sample
+# doesn't skip a phase.
+CONFIRM_SAMPLES = 2
+
+
+class BrewPhase(StrEnum):
+    """Phase of the shot in progress, in the order they happen."""
+
+    IDLE = "idle"
+    PREINFUSION = "preinfusion"
+    RAMP_UP = "ramp_up"
+    EXTRACTION = "extraction"
+    DECLINE = "decline"
+    AFTERFLOW = "afterflow"
+
+
+@dataclass(frozen=True)
+class PhaseBoundary:
+    """Start of a phase in seconds since the start of the shot."""
+
+    phase: BrewPhase
+    start: float
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return asdict(self)
+
+
+type PhaseListener = Callable[[BrewPhase], None]
+
+
+class XeniaBrewPhaseSegmenter:
+    """Classify every sample of the shot in progress into a brew phase.
+
+    Only the previous sample and a few running values are kept, so the work
+    per sample is constant. Phases only move forward; a phase can be skipped,
+    e.g. there is no preinfusion if pressure ramps up right away.
+    """
+
+    def __init__(self, coordinator: XeniaDataUpdateCoordinator) -> None:
+        """Initialize the segmenter."""
+        self.coordinator = coordinator
+        self.phase = BrewPhase.IDLE
+        self.boundaries: list[PhaseBoundary] = []
+        # Boundaries of the last completed shot.
+        self.last_boundaries: list[PhaseBoundary] | None = None
+        self._listeners: list[PhaseListener] = []
+        self._reset()
+
+    def _reset(self) -> None:
+        self._last: tuple[float, float, float] | None = None
+        self._pressure_slope = 0.0
+        self._weight_slope = 0.0
+        self._peak_pressure = 0.0
+        self._candidate: BrewPhase | None = None
+        self._candidate_start = 0.0
+        self._confirmed = 0
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start following the shot pipeline, returns a stop callback."""
+        return self.coordinator.shots.async_subscribe(self._handle_shot_event)
+
+    @callback
+    def async_subscribe(self, listener: PhaseListener) -> CALLBACK_TYPE:
+        """Subscribe to phase changes, returns an unsubscribe callback."""
+        self._listeners.append(listener)
+
+        @callback
+        def _unsubscribe() -> None:
+            self._listeners.remove(listener)
+
+        return _unsubscribe
+
+    def _set_phase(self, phase: BrewPhase, start: float | None = None) -> None:
+        self.phase = phase
+        self._candidate = None
+        self._confirmed = 0
+        if start is not None:
+            self.boundaries.append(PhaseBoundary(phase, round(start, 2)))
+        _LOGGER.debug("Brew phase %s", phase)
+        for listener in list(self._listeners):
+            listener(phase)
+
+    @callback
+    def _handle_shot_event(self, event: ShotEvent) -> None:
+        if isinstance(event, ShotStarted):
+            self._reset()
+            self.boundaries = []
+            self._set_phase(BrewPhase.PREINFUSION, 0.0)
+            # Backfilled samples are in the buffer already.
+            for index in range(len(event.shot)):
+                self._add_sample(event.shot, index)
+        elif isinstance(event, ShotSampleAdded):
+            self._add_sample(event.shot, len(event.shot) - 1)
+        elif isinstance(event, ShotCompleted):
+            self.last_boundaries = self.boundaries
+            self._end()
+        elif isinstance(event, (ShotAborted, ShotDiscarded, CleaningCycle)):
+            self._end()
+
+    def _end(self) -> None:
+        self.boundaries = []
+        self._reset()
+        if self.phase is not BrewPhase.IDLE:
+            self._set_phase(BrewPhase.IDLE)
+
+    def _add_sample(self, shot: ShotBuffer, index: int) -> None:
+        if self.phase is BrewPhase.IDLE or index < 0:
+            return
+        t = shot.timestamps[index]
+        pressure = shot.pump_pressures[index]
+        weight = shot.weights[index]
+        if self._last is not None and t > self._last[0]:
+            dt = t - self._last[0]
+            self._pressure_slope += SLOPE_ALPHA * (
+                (pressure - self._last[1]) / dt - self._pressure_slope
+            )
+            self._weight_slope += SLOPE_ALPHA * (
+                (weight - self._last[2]) / dt - self._weight_slope
+            )
+        self._last = (t, pressure, weight)
+
+        if shot.brew_end_time is not None:
+            if self.phase is not BrewPhase.AFTERFLOW:
+                self._set_phase(BrewPhase.AFTERFLOW, t)
+            return
+        if self.phase is BrewPhase.EXTRACTION:
+            self._peak_pressure = max(self._peak_pressure, pressure)
+        candidate = self._next_phase(pressure)
+        if candidate is None:
+            self._candidate = None
+            self._confirmed = 0
+            return
+        if candidate is not self._candidate:
+            self._candidate = candidate
+            self._candidate_start = t
+            self._confirmed = 0
+        self._confirmed += 1
+        if self._confirmed >= CONFIRM_SAMPLES:
+            # The phase began with the first sample pointing to it, the later
+            # ones only confirm it.
+            self._set_phase(candidate, self._candidate_start)
+            if candidate is BrewPhase.EXTRACTION:
+                self._peak_pressure = pressure
+
+    def _next_phase(self, pressure: float) -> BrewPhase | None:
+        """Return the phase the current sample points to, if it is a later one."""
+        slope = self._pressure_slope
+        extracting = self._weight_slope >= EXTRACTION_FLOW_G_PER_S or (
+            pressure >= PREINFUSION_MAX_BAR and abs(slope) < PLATEAU_SLOPE_BAR_PER_S
+        )
+        if self.phase is BrewPhase.PREINFUSION:
+            if extracting and pressure >= PREINFUSION_MAX_BAR:
+                return BrewPhase.EXTRACTION
+            if slope >= RAMP_SLOPE_BAR_PER_S or pressure >= PREINFUSION_MAX_BAR:
+                return BrewPhase.RAMP_UP
+        elif self.phase is BrewPhase.RAMP_UP:
+            if extracting:
+                return BrewPhase.EXTRACTION
+        elif self.phase is BrewPhase.EXTRACTION:
+            if (
+                pressure < self._peak_pressure * DECLINE_PEAK_RATIO
+                or slope <= DECLINE_SLOPE_BAR_PER_S
+            ):
+                return BrewPhase.DECLINE
+        return None
@@ -0,0 +1,296 @@
+"""Power budget manager that staggers heat-up across all Xenia machines."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from enum import StrEnum
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from aiohttp import ClientError
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+
+from .const import CONF_POWER_BUDGET, DEFAULT_POWER_BUDGET, XENIA_DOMAIN
+from .xenia import MachineStatus
+
+if TYPE_CHECKING:
+    from .coordinator import XeniaDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_POWER_MANAGER: HassKey[XeniaPowerManager] = HassKey(f"{XENIA_DOMAIN}_power")
+
+# Used when the machine does not report MA_MAX_PWR.
+DEFAULT_PEAK_AMPS = 16.0
+# Below this a machine is considered not to be heating.
+IDLE_AMPS = 1.0
+# How long an admitted request is accounted with its peak estimate before the
+# live MA_CUR_PWR reading is trusted.
+RESERVATION_SECONDS = 20.0
+BREW_BOILER_SETTLE_TOLERANCE = 2.0
+QUEUE_POLL_SECONDS = 1.0
+# Requests still waiting after this long are dropped, whoever asked for heat
+# has given up on it by then.
+REQUEST_TIMEOUT_SECONDS = 30 * 60.0
+
+
+class PowerRequestKind(StrEnum):
+    MACHINE = "machine"
+    STEAM_BOILER = "steam_boiler"
+
+
+@dataclass
+class PowerRequest:
+    coordinator: XeniaDataUpdateCoordinator
+    kind: PowerRequestKind
+    # Only for MACHINE requests, queue the steam boiler once the brew boiler settled.
+    steam_boiler: bool = False
+    created: float = field(default_factory=time.monotonic)
+    # Whether the machine was seen out of OFF while the request waited.
+    seen_powered: bool = False
+
+
+@callback
+def async_get_power_manager(hass: HomeAssistant) -> XeniaPowerManager:
+    """Return the power manager shared by all config entries."""
+    if (manager := hass.data.get(DATA_POWER_MANAGER)) is None:
+        manager = hass.data[DATA_POWER_MANAGER] = XeniaPowerManager(hass)
+    return manager
+
+
+class XeniaPowerManager:
+    """Admit heat-up requests of all machines against a shared ampere budget.
+
+    Turning a machine on draws its peak heating current until the boilers
+    reach their setpoints. Requests are queued and admitted in order whenever
+    the live MA_CUR_PWR readings of all machines leave enough headroom. The
+    steam boiler is only switched on once the brew boiler has settled.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the power manager."""
+        self.hass = hass
+        self._coordinators: dict[str, XeniaDataUpdateCoordinator] = {}
+        self._queue: list[PowerRequest] = []
+        self._reservations: dict[str, tuple[float, float]] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    @callback
+    def async_register(
+        self, coordinator: XeniaDataUpdateCoordinator
+    ) -> CALLBACK_TYPE:
+        """Register a machine, returns a callback to unregister it."""
+        entry_id = coordinator.config_entry.entry_id
+        self._coordinators[entry_id] = coordinator
+
+        @callback
+        def _unregister() -> None:
+            self.async_cancel(coordinator)
+            self._coordinators.pop(entry_id, None)
+            self._reservations.pop(entry_id, None)
+            if not self._coordinators and self._task is not None:
+                self._task.cancel()
+                self._task = None
+
+        return _unregister
+
+    @property
+    def budget(self) -> float:
+        """Return the ampere budget, 0 when no machine has one configured.
+
+        All machines share one circuit, so the lowest configured budget wins.
+        """
+        budgets = [
+            float(
+                coordinator.config_entry.options.get(
+                    CONF_POWER_BUDGET, DEFAULT_POWER_BUDGET
+                )
+            )
+            for coordinator in self._coordinators.values()
+        ]
+        return min((budget for budget in budgets if budget > 0), default=0.0)
+
+    @property
+    def queued(self) -> int:
+        """Return the number of requests waiting for admission."""
+        return len(self._queue)
+
+    async def async_turn_on(
+        self, coordinator: XeniaDataUpdateCoordinator, sb_on: bool = True
+    ) -> None:
+        """Turn a machine on, staggered against the budget if one is set."""
+        if not self.budget:
+            await coordinator.xenia.machine_turn_on(sb_on)
+            return
+        self._enqueue(
+            PowerRequest(coordinator, PowerRequestKind.MACHINE, steam_boiler=sb_on)
+        )
+
+    async def async_sb_turn_on(self, coordinator: XeniaDataUpdateCoordinator) -> None:
+        """Turn the steam boiler on, staggered against the budget if one is set."""
+        if not self.budget:
+            await coordinator.xenia.sb_turn_on()
+            return
+        self._enqueue(PowerRequest(coordinator, PowerRequestKind.STEAM_BOILER))
+
+    @callback
+    def async_cancel(
+        self,
+        coordinator: XeniaDataUpdateCoordinator,
+        kind: PowerRequestKind | None = None,
+    ) -> None:
+        """Drop pending requests of a machine, e.g. when it is turned off.
+
+        With a kind only requests of that kind are dropped.
+        """
+        self._queue = [
+            request
+            for request in self._queue
+            if request.coordinator is not coordinator
+            or (kind is not None and request.kind != kind)
+        ]
+
+    def _is_expired(self, request: PowerRequest, now: float) -> bool:
+        """Return whether a request timed out or its machine went OFF."""
+        if now - request.created > REQUEST_TIMEOUT_SECONDS:
+            return True
+        # A request for a machine that is OFF is only stale once the machine
+        # was seen out of OFF since, turning on from OFF is what it waits for.
+        if request.coordinator.data.overview.ma_status != MachineStatus.OFF:
+            request.seen_powered = True
+            return False
+        return request.seen_powered
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        queue: list[PowerRequest] = []
+        for request in self._queue:
+            if self._is_expired(request, now):
+                _LOGGER.debug(
+                    "Dropping %s request for %s after %.1fs",
+                    request.kind,
+                    request.coordinator.config_entry.title,
+                    now - request.created,
+                )
+            else:
+                queue.append(request)
+        self._queue = queue
+
+    def _enqueue(self, request: PowerRequest) -> None:
+        for queued in self._queue:
+            if (
+                queued.coordinator is request.coordinator
+                and queued.kind == request.kind
+            ):
+                queued.steam_boiler = request.steam_boiler
+                return
+        self._queue.append(request)
+        _LOGGER.debug(
+            "Queued %s request for %s (%d pending)",
+            request.kind,
+            request.coordinator.config_entry.title,
+            len(self._queue),
+        )
+        if self._task is None:
+            self._task = self.hass.async_create_background_task(
+                self._async_process_queue(), f"{XENIA_DOMAIN}_power_manager"
+            )
+
+    def _estimate(self, coordinator: XeniaDataUpdateCoordinator) -> float:
+        max_pwr = coordinator.data.overview.ma_max_pwr
+        return float(max_pwr) if max_pwr > 0 else DEFAULT_PEAK_AMPS
+
+    def _load(self) -> float:
+        """Return the current load, including fresh reservations."""
+        now = time.monotonic()
+        load = 0.0
+        for entry_id, coordinator in self._coordinators.items():
+            live = coordinator.data.overview.ma_cur_pwr
+            reserved, until = self._reservations.get(entry_id, (0.0, 0.0))
+            load += max(live, reserved) if now < until else live
+        return load
+
+    def _is_ready(self, request: PowerRequest) -> bool:
+        if request.kind is PowerRequestKind.MACHINE:
+            return True
+        data = request.coordinator.data
+        if data.overview.ma_status not in (
+            MachineStatus.ON,
+            MachineStatus.BREWING,
+            MachineStatus.DRAINING,
+        ):
+            return False
+        set_temp = data.overview_single.bb_set_temp
+        return (
+            set_temp > 0
+            and abs(data.overview.bb_sens_temp_a - set_temp)
+            <= BREW_BOILER_SETTLE_TOLERANCE
+        )
+
+    def _admit(self) -> PowerRequest | None:
+        """Return the first ready request that fits into the budget."""
+        budget = self.budget
+        load = self._load()
+        for request in self._queue:
+            if not self._is_ready(request):
+                continue
+            estimate = self._estimate(request.coordinator)
+            # A request larger than the whole budget still runs on its own.
+            if load + estimate <= budget or load < IDLE_AMPS:
+                self._queue.remove(request)
+                self._reservations[request.coordinator.config_entry.entry_id] = (
+                    estimate,
+                    time.monotonic() + RESERVATION_SECONDS,
+                )
+                return request
+            # Keep the order, later requests don't overtake a waiting one.
+            return None
+        return None
+
+    async def _async_process_queue(self) -> None:
+        try:
+            while self._queue:
+                self._expire()
+                if not self._queue:
+                    break
+                if not self.budget:
+                    # Budget was removed, release everything that is waiting.
+                    requests, self._queue = self._queue, []
+                    for request in requests:
+                        await self._async_execute(request)
+                    break
+                if (request := self._admit()) is None:
+                    await asyncio.sleep(QUEUE_POLL_SECONDS)
+                    continue
+                await self._async_execute(request)
+        finally:
+            self._task = None
+
+    async def _async_execute(self, request: PowerRequest) -> None:
+        coordinator = request.coordinator
+        _LOGGER.debug(
+            "Admitting %s request for %s after %.1fs at %.1fA load",
+            request.kind,
+            coordinator.config_entry.title,
+            time.monotonic() - request.created,
+            self._load(),
+        )
+        try:
+            if request.kind is PowerRequestKind.MACHINE:
+                await coordinator.xenia.machine_turn_on(False)
+            else:
+                await coordinator.xenia.sb_turn_on()
+        except (ClientError, TimeoutError, OSError) as err:
+            _LOGGER.warning(
+                "Power request for %s failed: %s", coordinator.config_entry.title, err
+            )
+            return
+        if request.kind is PowerRequestKind.MACHINE and request.steam_boiler:
+            self._queue.append(
+                PowerRequest(coordinator, PowerRequestKind.STEAM_BOILER)
+            )
+        await coordinator.async_request_refresh()
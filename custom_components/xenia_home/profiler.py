@@ -0,0 +1,247 @@
+"""On-demand timing of the integration's hot paths."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Coroutine
+from dataclasses import dataclass
+import functools
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import Entity
+from homeassistant.util.hass_dict import HassKey
+
+from .const import XENIA_DOMAIN
+from .coordinator import XeniaConfigEntry, XeniaDataUpdateCoordinator
+from .entity import XeniaEntity
+from .sensor import XeniaBrewPhaseSensor, XeniaDiagnosticSensor, XeniaSensor
+from .xenia import XeniaOverviewData, XeniaOverviewSingleData
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_PROFILER: HassKey[XeniaProfiler] = HassKey(f"{XENIA_DOMAIN}_profiler")
+
+
+@dataclass
+class FunctionTiming:
+    """Accumulated timing of one profiled function."""
+
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, elapsed: float) -> None:
+        self.calls += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+
+def _callback_name(func: Callable[..., Any]) -> str:
+    owner = getattr(func, "__self__", None)
+    if owner is not None:
+        return f"{type(owner).__name__}.{func.__name__}"
+    return getattr(func, "__qualname__", repr(func))
+
+
+class _TimedCallback:
+    """Timing wrapper that compares equal to the wrapped callback.
+
+    Listener lists are unsubscribed by value, so an unsubscribe during
+    profiling still finds and removes the wrapper.
+    """
+
+    __slots__ = ("func", "name", "profiler")
+
+    def __init__(
+        self, profiler: XeniaProfiler, name: str, func: Callable[..., Any]
+    ) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.func = func
+
+    def __call__(self, *args: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return self.func(*args)
+        finally:
+            self.profiler.record(self.name, time.perf_counter() - started)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, _TimedCallback):
+            other = other.func
+        return self.func == other
+
+    def __hash__(self) -> int:
+        return hash(self.func)
+
+
+class XeniaProfiler:
+    """Time decode, update, dispatch and entity write paths while running.
+
+    Profiling works by swapping the profiled functions for timing wrappers
+    and putting the originals back when stopped, so there is no overhead at
+    all while it is not running.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the profiler."""
+        self.hass = hass
+        self.timings: dict[str, FunctionTiming] = {}
+        self.started = 0.0
+        self._restore: list[Callable[[], None]] = []
+
+    def record(self, name: str, elapsed: float) -> None:
+        """Add one call of a profiled function."""
+        timing = self.timings.get(name)
+        if timing is None:
+            timing = self.timings[name] = FunctionTiming()
+        timing.add(elapsed)
+
+    def _timed(self, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - started)
+
+        return wrapper
+
+    def _timed_method(
+        self, attr: str, func: Callable[..., Any]
+    ) -> Callable[..., Any]:
+        """Time a method per class of the instance it is called on."""
+
+        @functools.wraps(func)
+        def wrapper(obj: Any, *args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return func(obj, *args, **kwargs)
+            finally:
+                self.record(
+                    f"{type(obj).__name__}.{attr}", time.perf_counter() - started
+                )
+
+        return wrapper
+
+    def _timed_async(
+        self, name: str, func: Callable[..., Coroutine[Any, Any, Any]]
+    ) -> Callable[..., Coroutine[Any, Any, Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - started)
+
+        return wrapper
+
+    def _patch(self, owner: type, attr: str, value: Any) -> None:
+        """Replace a class attribute until the profiler stops."""
+        if attr in owner.__dict__:
+            original = owner.__dict__[attr]
+            self._restore.append(lambda: setattr(owner, attr, original))
+        else:
+            # Inherited, removing the override restores it.
+            self._restore.append(lambda: delattr(owner, attr))
+        setattr(owner, attr, value)
+
+    def _patch_listeners(self, coordinator: XeniaDataUpdateCoordinator) -> None:
+        listeners = coordinator._listeners  # noqa: SLF001
+        originals = dict(listeners)
+        for key, (update_callback, context) in originals.items():
+            listeners[key] = (
+                _TimedCallback(self, _callback_name(update_callback), update_callback),
+                context,
+            )
+
+        def _restore_coordinator() -> None:
+            for key, entry in originals.items():
+                if key in listeners:
+                    listeners[key] = entry
+
+        self._restore.append(_restore_coordinator)
+
+        shot_listeners = coordinator.shots._listeners  # noqa: SLF001
+        for index, listener in enumerate(shot_listeners):
+            shot_listeners[index] = _TimedCallback(
+                self, f"shot listener {_callback_name(listener)}", listener
+            )
+
+        def _restore_shots() -> None:
+            shot_listeners[:] = [
+                listener.func if isinstance(listener, _TimedCallback) else listener
+                for listener in shot_listeners
+            ]
+
+        self._restore.append(_restore_shots)
+
+    @callback
+    def async_start(self, entries: list[XeniaConfigEntry]) -> None:
+        """Start timing."""
+        self.started = time.monotonic()
+        for cls in (XeniaOverviewData, XeniaOverviewSingleData):
+            from_dict = cls.__dict__["from_dict"].__func__
+            self._patch(
+                cls,
+                "from_dict",
+                staticmethod(self._timed(f"{cls.__name__}.from_dict", from_dict)),
+            )
+        self._patch(
+            XeniaDataUpdateCoordinator,
+            "_async_update_data",
+            self._timed_async(
+                "XeniaDataUpdateCoordinator._async_update_data (incl. I/O)",
+                XeniaDataUpdateCoordinator._async_update_data,  # noqa: SLF001
+            ),
+        )
+        self._patch(
+            XeniaDataUpdateCoordinator,
+            "async_update_listeners",
+            callback(
+                self._timed(
+                    "XeniaDataUpdateCoordinator.async_update_listeners",
+                    XeniaDataUpdateCoordinator.async_update_listeners,
+                )
+            ),
+        )
+        self._patch(
+            XeniaEntity,
+            "async_write_ha_state",
+            callback(
+                self._timed_method(
+                    "async_write_ha_state", Entity.async_write_ha_state
+                )
+            ),
+        )
+        for cls in (XeniaSensor, XeniaDiagnosticSensor, XeniaBrewPhaseSensor):
+            native_value = cls.__dict__["native_value"]
+            self._patch(
+                cls,
+                "native_value",
+                property(self._timed_method("native_value", native_value.fget)),
+            )
+        for entry in entries:
+            self._patch_listeners(entry.runtime_data)
+
+    @callback
+    def async_stop(self) -> list[dict[str, Any]]:
+        """Restore the original functions and return the timings."""
+        while self._restore:
+            self._restore.pop()()
+        return [
+            {
+                "function": name,
+                "calls": timing.calls,
+                "total_ms": round(timing.total * 1000, 3),
+                "mean_ms": round(timing.total * 1000 / timing.calls, 3),
+                "max_ms": round(timing.max * 1000, 3),
+            }
+            for name, timing in sorted(
+                self.timings.items(), key=lambda item: item[1].total, reverse=True
+            )
+        ]
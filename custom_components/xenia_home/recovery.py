@@ -0,0 +1,222 @@
+"""Thermal recovery between back-to-back shots."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, callback
+
+from .shot import ShotCompleted, ShotEvent, ShotStarted
+from .xenia import MachineStatus, SteamBoilerStatus
+
+if TYPE_CHECKING:
+    from .coordinator import XeniaCoordinatorData, XeniaDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# A boiler is recovered once it is back within this distance of its setpoint.
+TEMPERATURE_TOLERANCE = 1.0
+STEAM_PRESSURE_TOLERANCE = 0.1
+# A steam boiler pressure this far below the setpoint means steam was drawn.
+STEAM_DRAW_BAR = 0.3
+# Weight of the latest measurement in the running averages.
+RECOVERY_ALPHA = 0.3
+
+
+@dataclass(frozen=True)
+class RecoverySignal:
+    """A recovering value, error_fn returns its distance to the setpoint."""
+
+    key: str
+    tolerance: float
+    error_fn: Callable[[XeniaCoordinatorData], float]
+
+
+BREW_SIGNALS: tuple[RecoverySignal, ...] = (
+    RecoverySignal(
+        key="brew_boiler",
+        tolerance=TEMPERATURE_TOLERANCE,
+        error_fn=lambda data: (
+            data.overview.bb_sens_temp_a - data.overview_single.bb_set_temp
+        ),
+    ),
+    RecoverySignal(
+        key="brew_group",
+        tolerance=TEMPERATURE_TOLERANCE,
+        error_fn=lambda data: (
+            data.overview.bg_sens_temp_a - data.overview_single.bg_set_temp
+        ),
+    ),
+)
+STEAM_SIGNAL = RecoverySignal(
+    key="steam_boiler",
+    tolerance=STEAM_PRESSURE_TOLERANCE,
+    error_fn=lambda data: (
+        data.overview.sb_sens_press - data.overview_single.sb_set_press
+    ),
+)
+
+
+def _ema(current: float | None, value: float) -> float:
+    if current is None:
+        return value
+    return current + RECOVERY_ALPHA * (value - current)
+
+
+class XeniaRecoveryTracker:
+    """Measure how long the boilers take to recover after a shot or steaming.
+
+    Brew boiler and brew group recovery is timed from the end of each shot
+    until the temperature is back within tolerance of its setpoint, steam
+    boiler recovery from the lowest pressure after steam was drawn. A shot
+    started before the boilers recovered leaves no measurement, the recovery
+    time is unknown then.
+    """
+
+    def __init__(self, coordinator: XeniaDataUpdateCoordinator) -> None:
+        """Initialize the tracker."""
+        self.coordinator = coordinator
+        # Running averages in seconds, by signal key.
+        self.recovery: dict[str, float] = {}
+        self.shot_duration: float | None = None
+        self.last_recovery: float | None = None
+        self._pending: dict[str, float] = {}
+        self._shot_ended: float | None = None
+        # Time and pressure error of the lowest steam boiler pressure.
+        self._steam_low: tuple[float, float] | None = None
+        self._listeners: list[Callable[[], None]] = []
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the learned state for persistence."""
+        return {
+            "recovery": {key: round(value, 1) for key, value in self.recovery.items()},
+            "shot_duration": self.shot_duration,
+        }
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Restore the learned state."""
+        self.recovery = {
+            key: float(value) for key, value in data.get("recovery", {}).items()
+        }
+        self.shot_duration = data.get("shot_duration")
+
+    @property
+    def ready(self) -> bool:
+        """Return whether the machine is on and its brew boilers recovered."""
+        data = self.coordinator.data
+        return data.overview.ma_status == MachineStatus.ON and all(
+            abs(signal.error_fn(data)) <= signal.tolerance for signal in BREW_SIGNALS
+        )
+
+    @property
+    def shots_per_hour(self) -> float | None:
+        """Return the shot rate the boilers can keep up with.
+
+        One cycle is an average shot plus the slower of both brew recoveries.
+        """
+        recoveries = [self.recovery.get(signal.key) for signal in BREW_SIGNALS]
+        if self.shot_duration is None or None in recoveries:
+            return None
+        cycle = self.shot_duration + max(r for r in recoveries if r is not None)
+        return 3600 / cycle if cycle > 0 else None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start following shots and machine data, returns a stop callback."""
+        unsubscribe = self.coordinator.shots.async_subscribe(self._handle_shot_event)
+        remove_listener = self.coordinator.async_add_listener(
+            self._handle_coordinator_update
+        )
+
+        @callback
+        def _stop() -> None:
+            unsubscribe()
+            remove_listener()
+
+        return _stop
+
+    @callback
+    def async_subscribe(self, listener: Callable[[], None]) -> CALLBACK_TYPE:
+        """Subscribe to measurement changes, returns an unsubscribe callback."""
+        self._listeners.append(listener)
+
+        @callback
+        def _unsubscribe() -> None:
+            self._listeners.remove(listener)
+
+        return _unsubscribe
+
+    def _notify(self) -> None:
+        for listener in list(self._listeners):
+            listener()
+
+    def _now(self) -> float:
+        received = self.coordinator.overview_received
+        return received if received is not None else time.monotonic()
+
+    @callback
+    def _handle_shot_event(self, event: ShotEvent) -> None:
+        if isinstance(event, ShotStarted):
+            # Back to back, whatever hadn't recovered yet stays unknown.
+            self._pending.clear()
+            self._shot_ended = None
+        elif isinstance(event, ShotCompleted):
+            shot = event.shot
+            self.shot_duration = _ema(self.shot_duration, shot.duration_seconds)
+            # The event comes after the afterflow window, the boilers started
+            # recovering when brewing stopped.
+            self._shot_ended = time.monotonic() - shot.afterflow_seconds
+            self._pending = {signal.key: self._shot_ended for signal in BREW_SIGNALS}
+            self.last_recovery = None
+            self._notify()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        if not self.coordinator.last_update_success:
+            return
+        data = self.coordinator.data
+        now = self._now()
+        changed = False
+        for signal in BREW_SIGNALS:
+            started = self._pending.get(signal.key)
+            if started is None:
+                continue
+            if abs(signal.error_fn(data)) <= signal.tolerance:
+                self._record(signal.key, now - started)
+                del self._pending[signal.key]
+                changed = True
+        if self._shot_ended is not None and not self._pending:
+            self.last_recovery = now - self._shot_ended
+            self._shot_ended = None
+            self.coordinator.schedule_cache_save(force=True)
+        if self._track_steam(data, now) or changed:
+            self._notify()
+
+    def _track_steam(self, data: XeniaCoordinatorData, now: float) -> bool:
+        """Follow steam boiler recovery, returns whether it was measured."""
+        if (
+            data.overview.ma_status not in (MachineStatus.ON, MachineStatus.BREWING)
+            or data.overview.sb_status != SteamBoilerStatus.ON
+            or data.overview_single.sb_set_press <= 0
+        ):
+            self._steam_low = None
+            return False
+        error = STEAM_SIGNAL.error_fn(data)
+        if error <= -STEAM_DRAW_BAR:
+            # Recovery starts at the lowest pressure, once steaming stopped.
+            if self._steam_low is None or error < self._steam_low[1]:
+                self._steam_low = (now, error)
+        elif self._steam_low is not None and abs(error) <= STEAM_SIGNAL.tolerance:
+            self._record(STEAM_SIGNAL.key, now - self._steam_low[0])
+            self._steam_low = None
+            self.coordinator.schedule_cache_save(force=True)
+            return True
+        return False
+
+    def _record(self, key: str, seconds: float) -> None:
+        _LOGGER.debug("%s recovered in %.1fs", key, seconds)
+        self.recovery[key] = _ema(self.recovery.get(key), seconds)
@@ -1,6 +1,10 @@
+from collections import deque
 from collections.abc import Callable
 from dataclasses import dataclass
-from typing import Final
+from datetime import datetime, timedelta
+from statistics import median
+import time
+from typing import Any, Final
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -10,16 +14,20 @@ from homeassistant.components.sensor import (
 )
 from homeassistant.const import (
     CONF_HOST,
+    PERCENTAGE,
     EntityCategory,
     UnitOfElectricCurrent,
     UnitOfEnergy,
+    UnitOfFrequency,
     UnitOfPressure,
     UnitOfTemperature,
     UnitOfTime,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.typing import StateType
+from homeassistant.util import dt as dt_util
 
 from .coordinator import (
     XeniaConfigEntry,
@@ -27,6 +35,25 @@ from .coordinator import (
     XeniaDataUpdateCoordinator,
 )
 from .entity import XeniaEntity
+from .phases import BrewPhase
+
+
+@dataclass(frozen=True)
+class XeniaSensorFilter:
+    """Smoothing and reporting limits for a noisy sensor.
+
+    Values are passed through a median over median_window samples and an EMA
+    with ema_alpha (1.0 disables it). A new state is only written once the
+    filtered value moved by at least deadband since the last written state,
+    and not more often than every min_interval seconds. Unchanged ticks don't
+    reach the filter, so once the raw value held still for min_interval the
+    filter snaps to it instead of waiting for samples that never come.
+    """
+
+    median_window: int = 1
+    ema_alpha: float = 1.0
+    deadband: float = 0.0
+    min_interval: float = 0.0
 
 
 @dataclass(frozen=True)
@@ -41,6 +68,31 @@ class XeniaSensorEntityDescription(
     entity_category_fn: (
         Callable[[XeniaCoordinatorData], EntityCategory | None] | None
     ) = None
+    filter: XeniaSensorFilter | None = None
+
+
+TEMPERATURE_FILTER = XeniaSensorFilter(
+    median_window=3, ema_alpha=0.5, deadband=0.2, min_interval=5
+)
+PRESSURE_FILTER = XeniaSensorFilter(median_window=3, deadband=0.05, min_interval=2)
+# Pump pressure is what baristas watch during a shot, keep it responsive.
+PUMP_PRESSURE_FILTER = XeniaSensorFilter(deadband=0.1)
+CURRENT_FILTER = XeniaSensorFilter(median_window=3, deadband=0.1, min_interval=2)
+
+
+@dataclass(frozen=True)
+class XeniaDiagnosticSensorEntityDescription(SensorEntityDescription):
+    value_fn: Callable[[XeniaDataUpdateCoordinator], StateType]
+    attributes_fn: Callable[[XeniaDataUpdateCoordinator], dict[str, Any]] | None = (
+        None
+    )
+
+
+@dataclass(frozen=True, kw_only=True)
+class XeniaLearnedSensorEntityDescription(XeniaDiagnosticSensorEntityDescription):
+    subscribe_fn: Callable[
+        [XeniaDataUpdateCoordinator, Callable[[], None]], CALLBACK_TYPE
+    ]
 
 
 SENSOR_TYPES: Final[tuple[XeniaSensorEntityDescription, ...]] = (
@@ -51,7 +103,9 @@ SENSOR_TYPES: Final[tuple[XeniaSensorEntityDescription, ...]] = (
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:thermometer",
+        suggested_display_precision=1,
         value_fn=lambda data: data.overview.bg_sens_temp_a,
+        filter=TEMPERATURE_FILTER,
     ),
     XeniaSensorEntityDescription(
         key="brew_boiler_temperature",
@@ -60,7 +114,9 @@ SENSOR_TYPES: Final[tuple[XeniaSensorEntityDescription, ...]] = (
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:thermometer-water",
+        suggested_display_precision=1,
         value_fn=lambda data: data.overview.bb_sens_temp_a,
+        filter=TEMPERATURE_FILTER,
     ),
     XeniaSensorEntityDescription(
         key="pump_pressure",
@@ -69,7 +125,9 @@ SENSOR_TYPES: Final[tuple[XeniaSensorEntityDescription, ...]] = (
         device_class=SensorDeviceClass.PRESSURE,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:gauge",
+        suggested_display_precision=2,
         value_fn=lambda data: data.overview.pu_sens_press,
+        filter=PUMP_PRESSURE_FILTER,
     ),
     XeniaSensorEntityDescription(
         key="steam_boiler_pressure",
@@ -78,7 +136,9 @@ SENSOR_TYPES: Final[tuple[XeniaSensorEntityDescription, ...]] = (
         device_class=SensorDeviceClass.PRESSURE,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:gauge-full",
+        suggested_display_precision=2,
         value_fn=lambda data: data.overview.sb_sens_press,
+        filter=PRESSURE_FILTER,
     ),
     XeniaSensorEntityDescription(
         key="electric_current",
@@ -87,7 +147,9 @@ SENSOR_TYPES: Final[tuple[XeniaSensorEntityDescription, ...]] = (
         device_class=SensorDeviceClass.CURRENT,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:current-ac",
+        suggested_display_precision=1,
         value_fn=lambda data: data.overview.ma_cur_pwr,
+        filter=CURRENT_FILTER,
     ),
     XeniaSensorEntityDescription(
         key="total_energy",
@@ -117,6 +179,106 @@ SENSOR_TYPES: Final[tuple[XeniaSensorEntityDescription, ...]] = (
 )
 
 
+def _poll_rate_attributes(coordinator: XeniaDataUpdateCoordinator) -> dict[str, Any]:
+    attributes: dict[str, Any] = {}
+    for endpoint, stats in coordinator.tuner.endpoints.items():
+        p95 = stats.p95
+        attributes[f"{endpoint}_p95_ms"] = (
+            round(p95 * 1000, 1) if p95 is not None else None
+        )
+        attributes[f"{endpoint}_error_rate"] = round(stats.error_rate, 4)
+    return attributes
+
+
+def _round(value: float | None, digits: int) -> float | None:
+    return round(value, digits) if value is not None else None
+
+
+def _eco_policy_attributes(
+    coordinator: XeniaDataUpdateCoordinator,
+) -> dict[str, Any]:
+    policy = coordinator.eco_policy
+    now = dt_util.now()
+    return {
+        "enabled": policy.enabled,
+        "demand": _round(policy.demand(now), 2),
+        "next_hour_demand": _round(policy.demand(now + timedelta(hours=1)), 2),
+        "idle_power_kw": _round(policy.idle_power, 3),
+        "eco_power_kw": _round(policy.eco_power, 3),
+    }
+
+
+def _recovery_attributes(coordinator: XeniaDataUpdateCoordinator) -> dict[str, Any]:
+    recovery = coordinator.recovery
+    attributes: dict[str, Any] = {
+        f"{key}_recovery_seconds": round(seconds, 1)
+        for key, seconds in recovery.recovery.items()
+    }
+    attributes["shot_duration_seconds"] = _round(recovery.shot_duration, 1)
+    attributes["last_recovery_seconds"] = _round(recovery.last_recovery, 1)
+    return attributes
+
+
+DIAGNOSTIC_SENSOR_TYPES: Final[tuple[XeniaDiagnosticSensorEntityDescription, ...]] = (
+    XeniaDiagnosticSensorEntityDescription(
+        key="unchanged_response_rate",
+        translation_key="unchanged_response_rate",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon="mdi:content-duplicate",
+        suggested_display_precision=1,
+        value_fn=lambda coordinator: (
+            coordinator.xenia.unchanged_response_rate() * 100
+        ),
+    ),
+    XeniaDiagnosticSensorEntityDescription(
+        key="poll_rate",
+        translation_key="poll_rate",
+        native_unit_of_measurement=UnitOfFrequency.HERTZ,
+        device_class=SensorDeviceClass.FREQUENCY,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:speedometer",
+        suggested_display_precision=2,
+        value_fn=lambda coordinator: coordinator.tuner.rate,
+        attributes_fn=_poll_rate_attributes,
+    ),
+)
+
+
+LEARNED_SENSOR_TYPES: Final[tuple[XeniaLearnedSensorEntityDescription, ...]] = (
+    XeniaLearnedSensorEntityDescription(
+        key="eco_policy_energy_saved",
+        translation_key="eco_policy_energy_saved",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:leaf",
+        suggested_display_precision=2,
+        value_fn=lambda coordinator: round(coordinator.eco_policy.energy_saved, 4),
+        attributes_fn=_eco_policy_attributes,
+        subscribe_fn=lambda coordinator, listener: (
+            coordinator.eco_policy.async_subscribe(listener)
+        ),
+    ),
+    XeniaLearnedSensorEntityDescription(
+        key="sustainable_shots_per_hour",
+        translation_key="sustainable_shots_per_hour",
+        native_unit_of_measurement="shots/h",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:coffee-maker-check",
+        suggested_display_precision=0,
+        value_fn=lambda coordinator: coordinator.recovery.shots_per_hour,
+        attributes_fn=_recovery_attributes,
+        subscribe_fn=lambda coordinator, listener: (
+            coordinator.recovery.async_subscribe(listener)
+        ),
+    ),
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: XeniaConfigEntry,
@@ -126,6 +288,15 @@ async def async_setup_entry(
     async_add_entities(
         XeniaSensor(coordinator, description) for description in SENSOR_TYPES
     )
+    async_add_entities(
+        XeniaDiagnosticSensor(coordinator, description)
+        for description in DIAGNOSTIC_SENSOR_TYPES
+    )
+    async_add_entities(
+        XeniaLearnedSensor(coordinator, description)
+        for description in LEARNED_SENSOR_TYPES
+    )
+    async_add_entities([XeniaBrewPhaseSensor(coordinator)])
 
 
 class XeniaSensor(XeniaEntity, SensorEntity):
@@ -139,13 +310,225 @@ class XeniaSensor(XeniaEntity, SensorEntity):
         self._attr_unique_id = (
             f"{self.coordinator.config_entry.data[CONF_HOST]}_{entity_description.key}"
         )
+        self._filter = entity_description.filter
+        self._window: deque[float] = deque(
+            maxlen=self._filter.median_window if self._filter else 1
+        )
+        self._smoothed: float | None = None
+        # Last raw value and when it changed to it.
+        self._raw: float | None = None
+        self._raw_since = float("-inf")
+        self._reported: StateType = None
+        self._reported_at = float("-inf")
+        self._reported_available: bool | None = None
+        self._deferred_unsub: CALLBACK_TYPE | None = None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self._cancel_deferred)
+        if self._filter is not None:
+            self._filter_value()
+            if self._smoothed is not None:
+                self._reported = self._round(self._smoothed)
+            self._mark_reported()
 
     @property
     def native_value(self) -> StateType:
+        if self._filter is not None:
+            return self._reported
         return self.entity_description.value_fn(self.coordinator.data)
 
+    def _filter_value(self) -> bool:
+        """Feed the current raw value into the filter.
+
+        Returns True if the state has to be written regardless of the deadband.
+        """
+        assert self._filter is not None
+        raw = self.entity_description.value_fn(self.coordinator.data)
+        if not isinstance(raw, (int, float)):
+            self._window.clear()
+            self._smoothed = None
+            self._raw = None
+            changed = raw != self._reported
+            self._reported = raw
+            return changed
+        if raw != self._raw:
+            self._raw = float(raw)
+            self._raw_since = time.monotonic()
+        self._window.append(float(raw))
+        value = median(self._window)
+        if self._smoothed is None:
+            self._smoothed = value
+        else:
+            self._smoothed += self._filter.ema_alpha * (value - self._smoothed)
+        return not isinstance(self._reported, (int, float))
+
+    def _round(self, value: float) -> float:
+        precision = self.entity_description.suggested_display_precision
+        return round(value, precision if precision is not None else 2)
+
+    def _settle(self) -> float | None:
+        """Snap to a raw value that held still, returns seconds until it will."""
+        assert self._filter is not None
+        if self._raw is None or self._smoothed == self._raw:
+            return None
+        wait = self._raw_since + self._filter.min_interval - time.monotonic()
+        if wait > 0:
+            return wait
+        self._window.clear()
+        self._window.append(self._raw)
+        self._smoothed = self._raw
+        return None
+
+    def _mark_reported(self) -> None:
+        self._reported_at = time.monotonic()
+        self._reported_available = self.available
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        if self._filter is None:
+            super()._handle_coordinator_update()
+            return
+        if self._filter_value():
+            self._write_filtered()
+        else:
+            self._async_write_if_changed()
+
+    @callback
+    def _async_write_if_changed(self) -> None:
+        assert self._filter is not None
+        if self.available != self._reported_available:
+            self._write_filtered()
+            return
+        settle_wait = self._settle()
+        wait: float | None
+        if self._smoothed is None or not isinstance(self._reported, (int, float)):
+            wait = None
+        elif abs(self._smoothed - self._reported) < self._filter.deadband:
+            # Look again once the filter snapped to the raw value.
+            wait = settle_wait
+        else:
+            wait = self._reported_at + self._filter.min_interval - time.monotonic()
+            if wait <= 0:
+                self._write_filtered()
+                return
+        if wait is None:
+            self._cancel_deferred()
+        elif self._deferred_unsub is None:
+            # Unchanged ticks are skipped by the coordinator, so make sure the
+            # suppressed value still gets written once the interval is over.
+            self._deferred_unsub = async_call_later(
+                self.hass, wait, self._async_deferred_write
+            )
+
+    @callback
+    def _async_deferred_write(self, _now: datetime) -> None:
+        self._deferred_unsub = None
+        self._async_write_if_changed()
+
+    def _cancel_deferred(self) -> None:
+        if self._deferred_unsub is not None:
+            self._deferred_unsub()
+            self._deferred_unsub = None
+
+    def _write_filtered(self) -> None:
+        self._cancel_deferred()
+        if self._smoothed is not None:
+            self._reported = self._round(self._smoothed)
+        self._mark_reported()
+        self.async_write_ha_state()
+
     @property
     def entity_category(self) -> EntityCategory | None:
         if self.entity_description.entity_category_fn is not None:
             return self.entity_description.entity_category_fn(self.coordinator.data)
         return super().entity_category
+
+
+class XeniaDiagnosticSensor(XeniaEntity, SensorEntity):
+    """Sensor exposing client and coordinator internals.
+
+    These values change on ticks where the machine data does not, so they
+    are polled instead of following coordinator updates.
+    """
+
+    entity_description: XeniaDiagnosticSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: XeniaDataUpdateCoordinator,
+        entity_description: XeniaDiagnosticSensorEntityDescription,
+    ) -> None:
+        super().__init__(coordinator)
+        self.entity_description = entity_description
+        self._attr_unique_id = (
+            f"{self.coordinator.config_entry.data[CONF_HOST]}_{entity_description.key}"
+        )
+
+    @property
+    def should_poll(self) -> bool:
+        return True
+
+    async def async_update(self) -> None:
+        """Nothing to fetch, the state is read from memory."""
+
+    @property
+    def native_value(self) -> StateType:
+        return self.entity_description.value_fn(self.coordinator)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self.coordinator)
+
+
+class XeniaLearnedSensor(XeniaDiagnosticSensor):
+    """Sensor of a learned model, updated whenever the model notifies."""
+
+    entity_description: XeniaLearnedSensorEntityDescription
+
+    @property
+    def should_poll(self) -> bool:
+        return False
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.entity_description.subscribe_fn(
+                self.coordinator, self._handle_model_update
+            )
+        )
+
+    @callback
+    def _handle_model_update(self) -> None:
+        self.async_write_ha_state()
+
+
+class XeniaBrewPhaseSensor(XeniaEntity, SensorEntity):
+    """Phase of the shot in progress, idle between shots."""
+
+    _attr_translation_key = "brew_phase"
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = [phase.value for phase in BrewPhase]
+    _attr_icon = "mdi:coffee-maker-outline"
+
+    def __init__(self, coordinator: XeniaDataUpdateCoordinator) -> None:
+        super().__init__(coordinator)
+        self._attr_unique_id = (
+            f"{self.coordinator.config_entry.data[CONF_HOST]}_brew_phase"
+        )
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.phases.async_subscribe(self._handle_phase_change)
+        )
+
+    @callback
+    def _handle_phase_change(self, _phase: BrewPhase) -> None:
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> str:
+        return self.coordinator.phases.phase.value
@@ -0,0 +1,390 @@
+"""Services for the Xenia Espresso Machine integration."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+import logging
+import os
+from typing import Any
+
+from aiohttp import ClientError
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_NAME
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from .const import CONF_PROFILES, XENIA_DOMAIN
+from .coordinator import XeniaConfigEntry, XeniaDataUpdateCoordinator
+from .export import ExportFormat, ExportProgress, ShotSource, export_shots
+from .history import shot_history_path
+from .machine_profile import MachinePower, XeniaMachineProfile, async_apply_profile
+from .machines import async_loaded_machines
+from .profiler import DATA_PROFILER, XeniaProfiler
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_START_TIME = "start_time"
+ATTR_FILENAME = "filename"
+ATTR_FORMAT = "format"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_DURATION = "duration"
+ATTR_POWER = "power"
+ATTR_STEAM_BOILER = "steam_boiler"
+ATTR_BREW_GROUP_TEMPERATURE = "brew_group_temperature"
+ATTR_BREW_BOILER_TEMPERATURE = "brew_boiler_temperature"
+
+SERVICE_PIN_REFERENCE_SHOT = "pin_reference_shot"
+SERVICE_UNPIN_REFERENCE_SHOT = "unpin_reference_shot"
+SERVICE_EXPORT_SHOTS = "export_shots"
+SERVICE_PROFILE = "profile"
+SERVICE_APPLY_PROFILE = "apply_profile"
+SERVICE_SAVE_PROFILE = "save_profile"
+SERVICE_DELETE_PROFILE = "delete_profile"
+
+EVENT_EXPORT_PROGRESS = f"{XENIA_DOMAIN}_export_progress"
+
+PIN_REFERENCE_SHOT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(CONF_NAME): cv.string,
+        vol.Optional(ATTR_START_TIME): cv.string,
+    }
+)
+UNPIN_REFERENCE_SHOT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(CONF_NAME): cv.string,
+    }
+)
+EXPORT_SHOTS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_FILENAME): cv.string,
+        vol.Optional(ATTR_FORMAT, default=ExportFormat.CSV): vol.Coerce(
+            ExportFormat
+        ),
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+    }
+)
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=30): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=600)
+        ),
+    }
+)
+
+_SETPOINT = vol.All(vol.Coerce(float), vol.Range(min=60, max=96))
+MACHINE_PROFILE_FIELDS = {
+    vol.Optional(ATTR_POWER): vol.Coerce(MachinePower),
+    vol.Optional(ATTR_STEAM_BOILER): cv.boolean,
+    vol.Optional(ATTR_BREW_GROUP_TEMPERATURE): _SETPOINT,
+    vol.Optional(ATTR_BREW_BOILER_TEMPERATURE): _SETPOINT,
+}
+APPLY_PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(CONF_NAME): cv.string,
+        **MACHINE_PROFILE_FIELDS,
+    }
+)
+SAVE_PROFILE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+            vol.Required(CONF_NAME): cv.string,
+            **MACHINE_PROFILE_FIELDS,
+        }
+    ),
+    cv.has_at_least_one_key(
+        ATTR_POWER,
+        ATTR_STEAM_BOILER,
+        ATTR_BREW_GROUP_TEMPERATURE,
+        ATTR_BREW_BOILER_TEMPERATURE,
+    ),
+)
+DELETE_PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(CONF_NAME): cv.string,
+    }
+)
+
+
+def _get_coordinator(
+    hass: HomeAssistant, call: ServiceCall
+) -> XeniaDataUpdateCoordinator:
+    entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+    entry = hass.config_entries.async_get_entry(entry_id)
+    if entry is None or entry.domain != XENIA_DOMAIN:
+        raise ServiceValidationError(
+            translation_domain=XENIA_DOMAIN,
+            translation_key="entry_not_found",
+            translation_placeholders={"entry_id": entry_id},
+        )
+    if entry.state is not ConfigEntryState.LOADED:
+        raise ServiceValidationError(
+            translation_domain=XENIA_DOMAIN,
+            translation_key="entry_not_loaded",
+            translation_placeholders={"entry_id": entry_id},
+        )
+    return entry.runtime_data
+
+
+def _profile_from_call(call: ServiceCall) -> XeniaMachineProfile:
+    return XeniaMachineProfile(
+        power=call.data.get(ATTR_POWER),
+        steam_boiler=call.data.get(ATTR_STEAM_BOILER),
+        bg_set_temp=call.data.get(ATTR_BREW_GROUP_TEMPERATURE),
+        bb_set_temp=call.data.get(ATTR_BREW_BOILER_TEMPERATURE),
+    )
+
+
+def _saved_profiles(
+    coordinator: XeniaDataUpdateCoordinator,
+) -> dict[str, dict[str, Any]]:
+    return coordinator.config_entry.options.get(CONF_PROFILES, {})
+
+
+def _update_saved_profiles(
+    hass: HomeAssistant,
+    coordinator: XeniaDataUpdateCoordinator,
+    profiles: dict[str, dict[str, Any]],
+) -> None:
+    entry = coordinator.config_entry
+    hass.config_entries.async_update_entry(
+        entry, options={**entry.options, CONF_PROFILES: profiles}
+    )
+
+
+def _local_naive(value: datetime | None) -> datetime | None:
+    """Convert to the naive local time shots are recorded in."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+def _export_path(hass: HomeAssistant, filename: str) -> str:
+    """Return the absolute export path, which must be inside the config dir."""
+    config_dir = os.path.realpath(hass.config.config_dir)
+    path = os.path.realpath(hass.config.path(filename))
+    if os.path.commonpath((config_dir, path)) != config_dir or path == config_dir:
+        raise ServiceValidationError(
+            translation_domain=XENIA_DOMAIN,
+            translation_key="invalid_export_path",
+            translation_placeholders={"filename": filename},
+        )
+    return path
+
+
+def _export_sources(hass: HomeAssistant, call: ServiceCall) -> list[ShotSource]:
+    if ATTR_CONFIG_ENTRY_ID in call.data:
+        entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+        entry = hass.config_entries.async_get_entry(entry_id)
+        if entry is None or entry.domain != XENIA_DOMAIN:
+            raise ServiceValidationError(
+                translation_domain=XENIA_DOMAIN,
+                translation_key="entry_not_found",
+                translation_placeholders={"entry_id": entry_id},
+            )
+        entries = [entry]
+    else:
+        # The history outlives the loaded state, so unloaded entries count too.
+        entries = hass.config_entries.async_entries(XENIA_DOMAIN)
+    # Aliases have no history of their own, it is kept by the owning entry.
+    owners: dict[str, XeniaConfigEntry] = {}
+    for entry in entries:
+        if entry.state is ConfigEntryState.LOADED:
+            entry = entry.runtime_data.config_entry
+        owners.setdefault(entry.entry_id, entry)
+    return [
+        ShotSource(entry.title, shot_history_path(hass, entry.entry_id))
+        for entry in owners.values()
+    ]
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+
+    async def _async_pin_reference_shot(call: ServiceCall) -> None:
+        coordinator = _get_coordinator(hass, call)
+        try:
+            coordinator.shot_index.pin(
+                call.data[CONF_NAME], call.data.get(ATTR_START_TIME)
+            )
+        except KeyError as err:
+            raise ServiceValidationError(
+                translation_domain=XENIA_DOMAIN,
+                translation_key="shot_not_found",
+            ) from err
+
+    async def _async_unpin_reference_shot(call: ServiceCall) -> None:
+        coordinator = _get_coordinator(hass, call)
+        try:
+            coordinator.shot_index.unpin(call.data[CONF_NAME])
+        except KeyError as err:
+            raise ServiceValidationError(
+                translation_domain=XENIA_DOMAIN,
+                translation_key="reference_not_found",
+                translation_placeholders={"name": call.data[CONF_NAME]},
+            ) from err
+
+    async def _async_export_shots(call: ServiceCall) -> ServiceResponse:
+        path = _export_path(hass, call.data[ATTR_FILENAME])
+        sources = _export_sources(hass, call)
+        for source_entry in async_loaded_machines(hass):
+            # Include shots that completed just before the call.
+            await source_entry.runtime_data.history.async_flush()
+
+        def _report(progress: ExportProgress) -> None:
+            # Called from the executor, EventBus.fire is thread safe.
+            _LOGGER.debug("Shot export progress: %s", progress)
+            hass.bus.fire(EVENT_EXPORT_PROGRESS, progress.to_dict())
+
+        try:
+            result = await hass.async_add_executor_job(
+                export_shots,
+                sources,
+                path,
+                call.data[ATTR_FORMAT],
+                _local_naive(call.data.get(ATTR_START)),
+                _local_naive(call.data.get(ATTR_END)),
+                _report,
+            )
+        except OSError as err:
+            raise HomeAssistantError(
+                translation_domain=XENIA_DOMAIN,
+                translation_key="export_failed",
+                translation_placeholders={"path": path, "error": str(err)},
+            ) from err
+        _LOGGER.info(
+            "Exported %s shots with %s samples to %s",
+            result.shots,
+            result.samples,
+            path,
+        )
+        return {"path": path, "shots": result.shots, "samples": result.samples}
+
+    async def _async_profile(call: ServiceCall) -> ServiceResponse:
+        if DATA_PROFILER in hass.data:
+            raise ServiceValidationError(
+                translation_domain=XENIA_DOMAIN,
+                translation_key="profile_running",
+            )
+        profiler = hass.data[DATA_PROFILER] = XeniaProfiler(hass)
+        profiler.async_start(async_loaded_machines(hass))
+        try:
+            await asyncio.sleep(call.data[ATTR_DURATION])
+        finally:
+            functions = profiler.async_stop()
+            del hass.data[DATA_PROFILER]
+        _LOGGER.info(
+            "Profile of %.0f s:\n%s",
+            call.data[ATTR_DURATION],
+            "\n".join(
+                f"{f['function']}: {f['calls']} calls, {f['total_ms']} ms total, "
+                f"{f['max_ms']} ms max"
+                for f in functions
+            ),
+        )
+        return {"duration": call.data[ATTR_DURATION], "functions": functions}
+
+    async def _async_apply_profile(call: ServiceCall) -> ServiceResponse:
+        coordinator = _get_coordinator(hass, call)
+        profile = _profile_from_call(call)
+        if CONF_NAME in call.data:
+            saved = _saved_profiles(coordinator).get(call.data[CONF_NAME])
+            if saved is None:
+                raise ServiceValidationError(
+                    translation_domain=XENIA_DOMAIN,
+                    translation_key="machine_profile_not_found",
+                    translation_placeholders={"name": call.data[CONF_NAME]},
+                )
+            # Settings given with the call override the saved ones.
+            profile = XeniaMachineProfile.from_dict(saved).merge(profile)
+        try:
+            commands = await async_apply_profile(coordinator, profile)
+        except (ClientError, TimeoutError) as err:
+            raise HomeAssistantError(
+                translation_domain=XENIA_DOMAIN,
+                translation_key="apply_profile_failed",
+                translation_placeholders={"error": str(err)},
+            ) from err
+        return {"commands": [str(command) for command in commands]}
+
+    async def _async_save_profile(call: ServiceCall) -> None:
+        coordinator = _get_coordinator(hass, call)
+        profiles = dict(_saved_profiles(coordinator))
+        profiles[call.data[CONF_NAME]] = _profile_from_call(call).to_dict()
+        _update_saved_profiles(hass, coordinator, profiles)
+
+    async def _async_delete_profile(call: ServiceCall) -> None:
+        coordinator = _get_coordinator(hass, call)
+        profiles = dict(_saved_profiles(coordinator))
+        if profiles.pop(call.data[CONF_NAME], None) is None:
+            raise ServiceValidationError(
+                translation_domain=XENIA_DOMAIN,
+                translation_key="machine_profile_not_found",
+                translation_placeholders={"name": call.data[CONF_NAME]},
+            )
+        _update_saved_profiles(hass, coordinator, profiles)
+
+    hass.services.async_register(
+        XENIA_DOMAIN,
+        SERVICE_PIN_REFERENCE_SHOT,
+        _async_pin_reference_shot,
+        schema=PIN_REFERENCE_SHOT_SCHEMA,
+    )
+    hass.services.async_register(
+        XENIA_DOMAIN,
+        SERVICE_UNPIN_REFERENCE_SHOT,
+        _async_unpin_reference_shot,
+        schema=UNPIN_REFERENCE_SHOT_SCHEMA,
+    )
+    hass.services.async_register(
+        XENIA_DOMAIN,
+        SERVICE_EXPORT_SHOTS,
+        _async_export_shots,
+        schema=EXPORT_SHOTS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        XENIA_DOMAIN,
+        SERVICE_PROFILE,
+        _async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        XENIA_DOMAIN,
+        SERVICE_APPLY_PROFILE,
+        _async_apply_profile,
+        schema=APPLY_PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        XENIA_DOMAIN,
+        SERVICE_SAVE_PROFILE,
+        _async_save_profile,
+        schema=SAVE_PROFILE_SCHEMA,
+    )
+    hass.services.async_register(
+        XENIA_DOMAIN,
+        SERVICE_DELETE_PROFILE,
+        _async_delete_profile,
+        schema=DELETE_PROFILE_SCHEMA,
+    )
@@ -0,0 +1,508 @@
+"""Shot detection pipeline shared by all shot consumers of a coordinator."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util.ulid import ulid_now
+
+from .const import (
+    CONF_MAX_SHOT_SAMPLES,
+    CONF_MAX_SHOT_SECONDS,
+    DEFAULT_MAX_SHOT_SAMPLES,
+    DEFAULT_MAX_SHOT_SECONDS,
+)
+from .xenia import MachineStatus, XeniaOverviewData
+
+if TYPE_CHECKING:
+    from .coordinator import XeniaDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Per sample curves of a shot, in the order they are sent to the frontend.
+SHOT_CHANNELS = (
+    "timestamps",
+    "brew_group_temps",
+    "brew_boiler_temps",
+    "pump_pressures",
+    "flow_rates",
+    "weights",
+)
+
+
+@dataclass
+class ShotData:
+    """Raw data structure for a single espresso shot."""
+
+    shot_id: str
+    start_time: str
+    brew_end_time: str | None
+    afterflow_seconds: int
+    duration_seconds: float
+    dropped_samples: int
+    timestamps: list[float]
+    brew_group_temps: list[float]
+    brew_boiler_temps: list[float]
+    pump_pressures: list[float]
+    flow_rates: list[float]
+    weights: list[float]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return asdict(self)
+
+    def summary(self) -> dict[str, Any]:
+        """Return the shot without its curves."""
+        return {
+            "shot_id": self.shot_id,
+            "start_time": self.start_time,
+            "brew_end_time": self.brew_end_time,
+            "afterflow_seconds": self.afterflow_seconds,
+            "duration_seconds": self.duration_seconds,
+            "dropped_samples": self.dropped_samples,
+            "samples": len(self.timestamps),
+            "final_weight": self.weights[-1] if self.weights else None,
+            "max_pump_pressure": max(self.pump_pressures, default=None),
+            "max_flow_rate": max(self.flow_rates, default=None),
+        }
+
+
+@dataclass(frozen=True)
+class ShotStarted:
+    """A new shot has started."""
+
+    shot: ShotBuffer
+
+
+@dataclass(frozen=True)
+class ShotSampleAdded:
+    """A live sample was appended to the shot in progress."""
+
+    shot: ShotBuffer
+
+
+@dataclass(frozen=True)
+class ShotCompleted:
+    """A shot finished, including its afterflow window."""
+
+    shot: ShotData
+
+
+@dataclass(frozen=True)
+class ShotAborted:
+    """A shot was dropped because it exceeded the configured limits."""
+
+    start_time: str
+    reason: str
+    duration_seconds: float
+    samples: int
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class ShotDiscarded:
+    """A brewing session was too short, or too dry, to count as a shot."""
+
+    duration_seconds: float
+
+
+@dataclass(frozen=True)
+class CleaningCycle:
+    """A backflush / cleaning program was detected instead of a shot."""
+
+    pulses: int
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return asdict(self)
+
+
+type ShotEvent = (
+    ShotStarted
+    | ShotSampleAdded
+    | ShotCompleted
+    | ShotAborted
+    | ShotDiscarded
+    | CleaningCycle
+)
+type ShotListener = Callable[[ShotEvent], None]
+
+
+class ShotBuffer:
+    """Samples of the shot in progress.
+
+    Beyond the sample limit the buffers behave as ring buffers. Consumers get
+    a reference to the live buffer and must not modify it.
+    """
+
+    def __init__(self, max_samples: int, start_time: datetime | None = None) -> None:
+        """Initialize an empty shot buffer."""
+        self.shot_id = ulid_now()
+        self.start_time = start_time or datetime.now()
+        self.brew_end_time: datetime | None = None
+        self.timestamps: deque[float] = deque(maxlen=max_samples)
+        self.brew_group_temps: deque[float] = deque(maxlen=max_samples)
+        self.brew_boiler_temps: deque[float] = deque(maxlen=max_samples)
+        self.pump_pressures: deque[float] = deque(maxlen=max_samples)
+        self.flow_rates: deque[float] = deque(maxlen=max_samples)
+        self.weights: deque[float] = deque(maxlen=max_samples)
+        self.dropped_samples = 0
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def elapsed(self) -> float:
+        """Return the seconds since the shot started."""
+        return (datetime.now() - self.start_time).total_seconds()
+
+    def append(
+        self, overview: XeniaOverviewData, sampled_at: datetime | None = None
+    ) -> None:
+        """Append one sample, taken now unless sampled_at is given."""
+        if len(self.timestamps) == self.timestamps.maxlen:
+            self.dropped_samples += 1
+        if sampled_at is None:
+            self.timestamps.append(self.elapsed())
+        else:
+            self.timestamps.append((sampled_at - self.start_time).total_seconds())
+        self.brew_group_temps.append(overview.bg_sens_temp_a)
+        self.brew_boiler_temps.append(overview.bb_sens_temp_a)
+        self.pump_pressures.append(overview.pu_sens_press)
+        self.flow_rates.append(overview.pu_sens_flow_meter_ml)
+        self.weights.append(overview.scale_weight)
+
+    def to_shot_data(self, duration: float, afterflow_seconds: int) -> ShotData:
+        """Freeze the buffer into the ShotData shared by all consumers."""
+        return ShotData(
+            shot_id=self.shot_id,
+            start_time=self.start_time.isoformat(),
+            brew_end_time=(
+                self.brew_end_time.isoformat() if self.brew_end_time else None
+            ),
+            afterflow_seconds=afterflow_seconds,
+            duration_seconds=round(duration, 2),
+            dropped_samples=self.dropped_samples,
+            timestamps=list(self.timestamps),
+            brew_group_temps=list(self.brew_group_temps),
+            brew_boiler_temps=list(self.brew_boiler_temps),
+            pump_pressures=list(self.pump_pressures),
+            flow_rates=list(self.flow_rates),
+            weights=list(self.weights),
+        )
+
+
+class XeniaShotPipeline:
+    """Detect shots from coordinator updates and publish them to subscribers.
+
+    Shots are detected once per coordinator and the resulting events are
+    handed to every subscriber as the same objects.
+    """
+
+    afterflow_seconds = 2
+    min_shot_seconds = 10
+    # Backflush programs show up as repeated pressure pulses, either within one
+    # BREWING session or as a burst of sessions too short to be a shot.
+    _pulse_high_bar = 4.0
+    _pulse_low_bar = 1.0
+    _cleaning_min_pulses = 3
+    _cleaning_window_seconds = 180
+    # Backflush pulses can be as long as short shots. Sessions up to this long
+    # that moved no water count as pulses too, once the machine has shown it
+    # reports flow at all.
+    _cleaning_pulse_seconds = 20
+    _no_flow_rate = 0.5
+    _no_weight_grams = 1.0
+    # MA_STATUS flips to BREWING up to a tick late. The last samples before it
+    # are kept and, if they already show pump activity, backfilled into the
+    # shot so preinfusion is part of the curve.
+    _pretrigger_samples = 5
+    _pretrigger_pressure_bar = 1.0
+    # Unchanged ticks don't add samples, so the buffer can hold samples from
+    # long before the shot (e.g. line pressure on plumbed machines). Only the
+    # last poll intervals count as pre-trigger.
+    _pretrigger_max_intervals = 2
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator: XeniaDataUpdateCoordinator
+    ) -> None:
+        """Initialize the shot pipeline."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.is_brewing = False
+        self.current: ShotBuffer | None = None
+        self._listeners: list[ShotListener] = []
+        self._pretrigger: deque[tuple[datetime, XeniaOverviewData]] = deque(
+            maxlen=self._pretrigger_samples
+        )
+        self._pressure_high = False
+        self._pressure_pulses = 0
+        self._short_sessions: deque[float] = deque(maxlen=self._cleaning_min_pulses)
+        self._flow_meter_seen = False
+        self._afterflow_until: datetime | None = None
+        self._afterflow_unsub: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start following coordinator updates, returns a stop callback."""
+        remove_listener = self.coordinator.async_add_listener(
+            self._handle_coordinator_update
+        )
+
+        @callback
+        def _stop() -> None:
+            remove_listener()
+            self._cancel_afterflow()
+
+        return _stop
+
+    @callback
+    def async_subscribe(self, listener: ShotListener) -> CALLBACK_TYPE:
+        """Subscribe to shot events, returns an unsubscribe callback."""
+        self._listeners.append(listener)
+
+        @callback
+        def _unsubscribe() -> None:
+            self._listeners.remove(listener)
+
+        return _unsubscribe
+
+    def _publish(self, event: ShotEvent) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception:
+                _LOGGER.exception("Error in shot listener %s", listener)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle coordinator updates to track brewing sessions."""
+        overview = self.coordinator.data.overview
+        is_currently_brewing = overview.ma_status == MachineStatus.BREWING
+        if is_currently_brewing and not self.is_brewing:
+            self._cancel_afterflow()
+            self._start_shot_tracking(overview)
+        elif is_currently_brewing and self.is_brewing:
+            self._collect_shot_data(overview)
+            self._check_runaway()
+        elif not is_currently_brewing and self.is_brewing:
+            if self.current is not None:
+                self._start_afterflow()
+                self._collect_shot_data(overview)
+        elif self._afterflow_until is not None:
+            self._collect_shot_data(overview)
+            if datetime.now() >= self._afterflow_until:
+                self._complete_shot_tracking()
+        else:
+            now = datetime.now()
+            self._prune_pretrigger(now)
+            self._pretrigger.append((now, overview))
+
+        self.is_brewing = is_currently_brewing
+
+    def _option(self, key: str, default: int) -> int:
+        return int(self.coordinator.config_entry.options.get(key, default))
+
+    def _is_brew_signature(
+        self, overview: XeniaOverviewData, previous: XeniaOverviewData | None
+    ) -> bool:
+        """Return True if a sample already looks like water going through the puck."""
+        if overview.pu_sens_press >= self._pretrigger_pressure_bar:
+            return True
+        if overview.pu_level_pw_control > 0:
+            return True
+        return (
+            previous is not None
+            and overview.pu_sens_flow_meter_ml > previous.pu_sens_flow_meter_ml
+        )
+
+    def _prune_pretrigger(self, now: datetime) -> None:
+        """Drop pre-trigger samples older than the last poll intervals."""
+        max_age = self.coordinator.update_interval * self._pretrigger_max_intervals
+        while self._pretrigger and now - self._pretrigger[0][0] > max_age:
+            self._pretrigger.popleft()
+
+    def _take_pretrigger(self) -> list[tuple[datetime, XeniaOverviewData]]:
+        """Return the trailing pre-trigger samples that show a brew signature."""
+        self._prune_pretrigger(datetime.now())
+        samples = list(self._pretrigger)
+        self._pretrigger.clear()
+        onset = len(samples)
+        while onset > 0:
+            previous = samples[onset - 2][1] if onset > 1 else None
+            if not self._is_brew_signature(samples[onset - 1][1], previous):
+                break
+            onset -= 1
+        return samples[onset:]
+
+    def _start_shot_tracking(self, overview: XeniaOverviewData) -> None:
+        """Start tracking a new shot at its true onset."""
+        pretrigger = self._take_pretrigger()
+        self.current = ShotBuffer(
+            self._option(CONF_MAX_SHOT_SAMPLES, DEFAULT_MAX_SHOT_SAMPLES),
+            pretrigger[0][0] if pretrigger else None,
+        )
+        self._pressure_high = False
+        self._pressure_pulses = 0
+        for sampled_at, sample in pretrigger:
+            self._collect_shot_data(sample, sampled_at)
+        _LOGGER.debug(
+            "Started tracking new espresso shot, backfilled %d sample(s)",
+            len(pretrigger),
+        )
+        self._publish(ShotStarted(self.current))
+        self._collect_shot_data(overview)
+
+    def _reset_shot(self) -> None:
+        """Drop the current shot without publishing it."""
+        self._cancel_afterflow()
+        self.current = None
+
+    def _check_runaway(self) -> None:
+        """Abort a shot that stays BREWING for longer than the configured limit."""
+        if self.current is None:
+            return
+        max_seconds = self._option(CONF_MAX_SHOT_SECONDS, DEFAULT_MAX_SHOT_SECONDS)
+        elapsed = self.current.elapsed()
+        if elapsed < max_seconds:
+            return
+        if self._pressure_pulses >= self._cleaning_min_pulses:
+            self._publish_cleaning_cycle(self._pressure_pulses)
+        else:
+            _LOGGER.warning(
+                "Shot exceeded %ss, aborting shot tracking until brewing stops",
+                max_seconds,
+            )
+            self._publish(
+                ShotAborted(
+                    start_time=self.current.start_time.isoformat(),
+                    reason="max_duration",
+                    duration_seconds=round(elapsed, 2),
+                    samples=len(self.current) + self.current.dropped_samples,
+                )
+            )
+        # Tracking stays off until MA_STATUS leaves BREWING.
+        self._reset_shot()
+
+    def _publish_cleaning_cycle(self, pulses: int) -> None:
+        """Publish a cleaning cycle instead of recording a shot."""
+        _LOGGER.debug("Detected cleaning cycle with %d pressure pulses", pulses)
+        self._short_sessions.clear()
+        self._publish(CleaningCycle(pulses))
+
+    def _track_short_session(self) -> None:
+        """Detect backflush programs that toggle BREWING for short pulses.
+
+        The sessions have to follow each other without a shot in between.
+        """
+        now = time.monotonic()
+        self._short_sessions.append(now)
+        if (
+            len(self._short_sessions) == self._cleaning_min_pulses
+            and now - self._short_sessions[0] <= self._cleaning_window_seconds
+        ):
+            self._publish_cleaning_cycle(len(self._short_sessions))
+
+    def _start_afterflow(self) -> None:
+        """Start a short afterflow window to capture drips."""
+        if self._afterflow_until is not None or self.current is None:
+            return
+        self.current.brew_end_time = datetime.now()
+        self._afterflow_until = datetime.now() + timedelta(
+            seconds=self.afterflow_seconds
+        )
+        # The coordinator skips updates while the data is unchanged, so the
+        # afterflow window can't rely on ticks to be closed.
+        self._afterflow_unsub = async_call_later(
+            self.hass, self.afterflow_seconds, self._async_afterflow_elapsed
+        )
+
+    @callback
+    def _async_afterflow_elapsed(self, _now: datetime) -> None:
+        """Complete the shot once the afterflow window has passed."""
+        self._afterflow_unsub = None
+        if self._afterflow_until is None:
+            return
+        self._complete_shot_tracking()
+
+    def _cancel_afterflow(self) -> None:
+        """Cancel any active afterflow window."""
+        if self._afterflow_unsub is not None:
+            self._afterflow_unsub()
+            self._afterflow_unsub = None
+        self._afterflow_until = None
+
+    def _collect_shot_data(
+        self, overview: XeniaOverviewData, sampled_at: datetime | None = None
+    ) -> None:
+        """Collect data point during brewing."""
+        if self.current is None:
+            return
+
+        pressure = overview.pu_sens_press
+        if not self._pressure_high and pressure >= self._pulse_high_bar:
+            self._pressure_high = True
+            self._pressure_pulses += 1
+        elif self._pressure_high and pressure <= self._pulse_low_bar:
+            self._pressure_high = False
+
+        self.current.append(overview, sampled_at)
+        if sampled_at is None:
+            # Backfilled samples are part of the buffer handed out by ShotStarted.
+            self._publish(ShotSampleAdded(self.current))
+
+    def _complete_shot_tracking(self) -> None:
+        """Complete shot tracking and publish the shot."""
+        self._cancel_afterflow()
+        shot = self.current
+        if shot is None or not len(shot):
+            _LOGGER.warning("Shot ended but no data was collected")
+            return
+
+        if shot.brew_end_time is not None:
+            duration = (shot.brew_end_time - shot.start_time).total_seconds()
+        else:
+            duration = shot.elapsed()
+        self._reset_shot()
+        if self._pressure_pulses >= self._cleaning_min_pulses:
+            self._publish_cleaning_cycle(self._pressure_pulses)
+            return
+        has_flow = max(shot.flow_rates, default=0.0) >= self._no_flow_rate
+        if duration < self.min_shot_seconds or (
+            duration < self._cleaning_pulse_seconds
+            and self._flow_meter_seen
+            and not has_flow
+            and max(shot.weights, default=0.0) < self._no_weight_grams
+        ):
+            _LOGGER.debug(
+                "Ignoring short or dry session: duration=%.2fs, flow=%s",
+                duration,
+                has_flow,
+            )
+            self._publish(ShotDiscarded(round(duration, 2)))
+            self._track_short_session()
+            return
+
+        # Only back to back short sessions make a cleaning cycle, a real shot
+        # in between breaks the sequence.
+        self._short_sessions.clear()
+        self._flow_meter_seen |= has_flow
+        shot_data = shot.to_shot_data(duration, self.afterflow_seconds)
+        self._publish(ShotCompleted(shot_data))
+
+        final_weight = shot_data.weights[-1] if shot_data.weights else 0.0
+        _LOGGER.info(
+            "Shot completed: duration=%.1fs, weight=%.1fg",
+            duration,
+            final_weight,
+        )
@@ -0,0 +1,223 @@
+"""Similarity search of shots against pinned reference shots."""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import deque
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+import logging
+import math
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, callback
+
+from .shot import ShotCompleted, ShotData, ShotEvent
+
+if TYPE_CHECKING:
+    from .coordinator import XeniaDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Common time base all curves are resampled to.
+GRID_STEP_SECONDS = 1.0
+GRID_POINTS = 60
+# Curves may be shifted by up to this many grid points against each other,
+# so a slightly earlier or later onset is not counted as deviation.
+SHIFT_BAND = 3
+RECENT_SHOTS = 30
+
+
+def resample(timestamps: Sequence[float], values: Sequence[float]) -> list[float]:
+    """Linearly resample a curve onto the common grid, holding the last value."""
+    if not timestamps:
+        return [0.0] * GRID_POINTS
+    result: list[float] = []
+    last = len(timestamps) - 1
+    for i in range(GRID_POINTS):
+        t = i * GRID_STEP_SECONDS
+        idx = bisect_right(timestamps, t)
+        if idx == 0:
+            result.append(values[0])
+        elif idx > last:
+            result.append(values[last])
+        else:
+            t0, t1 = timestamps[idx - 1], timestamps[idx]
+            v0, v1 = values[idx - 1], values[idx]
+            ratio = (t - t0) / (t1 - t0) if t1 > t0 else 0.0
+            result.append(v0 + (v1 - v0) * ratio)
+    return result
+
+
+@dataclass(frozen=True)
+class ShotProfile:
+    """A shot resampled onto the common time base."""
+
+    start_time: str
+    duration_seconds: float
+    pressure: list[float]
+    flow: list[float]
+    weight: list[float]
+
+    @staticmethod
+    def from_shot(shot: ShotData) -> ShotProfile:
+        return ShotProfile(
+            start_time=shot.start_time,
+            duration_seconds=shot.duration_seconds,
+            pressure=resample(shot.timestamps, shot.pump_pressures),
+            flow=resample(shot.timestamps, shot.flow_rates),
+            weight=resample(shot.timestamps, shot.weights),
+        )
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> ShotProfile:
+        return ShotProfile(
+            start_time=data["start_time"],
+            duration_seconds=float(data["duration_seconds"]),
+            pressure=[float(v) for v in data["pressure"]],
+            flow=[float(v) for v in data["flow"]],
+            weight=[float(v) for v in data["weight"]],
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    def channels(self) -> tuple[list[float], list[float], list[float]]:
+        return (self.pressure, self.flow, self.weight)
+
+
+def _channel_distance(shot: list[float], ref: list[float], scale: float) -> float:
+    """Return the smallest mean squared difference within the shift band."""
+    best = math.inf
+    for shift in range(-SHIFT_BAND, SHIFT_BAND + 1):
+        if shift >= 0:
+            pairs = zip(shot[shift:], ref)
+        else:
+            pairs = zip(shot, ref[-shift:])
+        count = GRID_POINTS - abs(shift)
+        total = sum((a - b) * (a - b) for a, b in pairs)
+        best = min(best, total / count)
+    return best / (scale * scale)
+
+
+def deviation(shot: ShotProfile, ref: ShotProfile) -> float | None:
+    """Return the deviation of a shot from a reference in percent of its range.
+
+    Each channel is normalized by the reference's peak so pressure, flow and
+    weight contribute equally. None if the reference is flat in every channel,
+    there is nothing to compare against then.
+    """
+    total = 0.0
+    channels = 0
+    for shot_values, ref_values in zip(shot.channels(), ref.channels()):
+        scale = max(abs(v) for v in ref_values)
+        if scale <= 0:
+            continue
+        total += _channel_distance(shot_values, ref_values, scale)
+        channels += 1
+    if not channels:
+        return None
+    return math.sqrt(total / channels) * 100
+
+
+@dataclass(frozen=True)
+class ReferenceMatch:
+    """Best matching reference shot of a completed shot."""
+
+    reference: str
+    reference_start_time: str
+    deviation: float
+    compute_ms: float
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return asdict(self)
+
+
+class XeniaShotIndex:
+    """In-memory index of recent shots and pinned reference shots."""
+
+    def __init__(self, coordinator: XeniaDataUpdateCoordinator) -> None:
+        """Initialize the shot index."""
+        self.coordinator = coordinator
+        self.recent: deque[ShotProfile] = deque(maxlen=RECENT_SHOTS)
+        self.references: dict[str, ShotProfile] = {}
+        self.last_match: ReferenceMatch | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the pinned references for persistence."""
+        return {
+            "references": {
+                name: profile.to_dict() for name, profile in self.references.items()
+            }
+        }
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Restore pinned references."""
+        self.references = {
+            name: ShotProfile.from_dict(profile)
+            for name, profile in data.get("references", {}).items()
+        }
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start following the shot pipeline, returns a stop callback."""
+        return self.coordinator.shots.async_subscribe(self._handle_shot_event)
+
+    def pin(self, name: str, start_time: str | None = None) -> ShotProfile:
+        """Pin a recent shot as reference, the last one if no start time is given.
+
+        Raises KeyError if there is no matching recent shot.
+        """
+        if start_time is None:
+            if not self.recent:
+                raise KeyError("no recent shot")
+            profile = self.recent[-1]
+        else:
+            profile = next(
+                (
+                    shot
+                    for shot in reversed(self.recent)
+                    if shot.start_time == start_time
+                ),
+                None,
+            )
+            if profile is None:
+                raise KeyError(start_time)
+        self.references[name] = profile
+        self.coordinator.schedule_cache_save(force=True)
+        return profile
+
+    def unpin(self, name: str) -> None:
+        """Remove a pinned reference, raises KeyError if it does not exist."""
+        del self.references[name]
+        self.coordinator.schedule_cache_save(force=True)
+
+    def best_match(self, profile: ShotProfile) -> ReferenceMatch | None:
+        """Return the closest pinned reference of a shot."""
+        started = time.perf_counter()
+        scores = [
+            (name, score)
+            for name, reference in self.references.items()
+            if (score := deviation(profile, reference)) is not None
+        ]
+        if not scores:
+            return None
+        name, score = min(scores, key=lambda item: item[1])
+        return ReferenceMatch(
+            reference=name,
+            reference_start_time=self.references[name].start_time,
+            deviation=round(score, 2),
+            compute_ms=round((time.perf_counter() - started) * 1000, 3),
+        )
+
+    @callback
+    def _handle_shot_event(self, event: ShotEvent) -> None:
+        if not isinstance(event, ShotCompleted):
+            return
+        profile = ShotProfile.from_shot(event.shot)
+        self.last_match = self.best_match(profile)
+        self.recent.append(profile)
+        if self.last_match is not None:
+            _LOGGER.debug("Shot matched reference %s", self.last_match)
@@ -0,0 +1,212 @@
+"""Live streaming of the shot in progress to WebSocket subscribers."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.json import json_bytes
+
+from .shot import (
+    SHOT_CHANNELS,
+    CleaningCycle,
+    ShotAborted,
+    ShotBuffer,
+    ShotCompleted,
+    ShotDiscarded,
+    ShotEvent,
+    ShotStarted,
+)
+
+if TYPE_CHECKING:
+    from .coordinator import XeniaDataUpdateCoordinator
+
+DEFAULT_BATCH_INTERVAL = 1.0
+
+# Sends an already serialized event message.
+type StreamSender = Callable[[str], None]
+
+
+def _samples_since(
+    shot: ShotBuffer, index: int, end: int | None = None
+) -> tuple[int, dict[str, list[float]]]:
+    """Return the samples from absolute index to end, and the index of the first.
+
+    Indices count every sample of the shot, including ones the ring buffer
+    already dropped; those can't be sent anymore and are skipped.
+    """
+    start = max(index, shot.dropped_samples)
+    skip = start - shot.dropped_samples
+    stop = None if end is None else max(end - shot.dropped_samples, skip)
+    return start, {
+        channel: list(islice(getattr(shot, channel), skip, stop))
+        for channel in SHOT_CHANNELS
+    }
+
+
+def _event_message(msg_id: int, event: str) -> str:
+    return f'{{"id":{msg_id},"type":"event","event":{event}}}'
+
+
+def _send(sender: StreamSender, msg_id: int, payload: dict[str, Any]) -> None:
+    sender(_event_message(msg_id, json_bytes(payload).decode()))
+
+
+def _total_samples(shot: ShotBuffer) -> int:
+    return len(shot) + shot.dropped_samples
+
+
+class _StreamGroup:
+    """Subscribers sharing a batch interval, each batch is built once."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.senders: dict[int, StreamSender] = {}
+        self.sent = 0
+        self.unsub_timer: CALLBACK_TYPE | None = None
+
+    def send(self, payload: dict[str, Any]) -> None:
+        # Serialized once for all subscribers instead of once per connection.
+        event = json_bytes(payload).decode()
+        for msg_id, sender in list(self.senders.items()):
+            sender(_event_message(msg_id, event))
+
+    def stop_timer(self) -> None:
+        if self.unsub_timer is not None:
+            self.unsub_timer()
+            self.unsub_timer = None
+
+
+class XeniaShotStream:
+    """Push new samples of the shot in progress in batches.
+
+    Subscribers are grouped by batch interval. A group only runs a timer
+    while a shot is in progress, and every batch only carries the samples
+    added since the group's previous batch.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator: XeniaDataUpdateCoordinator
+    ) -> None:
+        """Initialize the shot stream."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._groups: dict[float, _StreamGroup] = {}
+        self._shot: ShotBuffer | None = None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start following the shot pipeline, returns a stop callback."""
+        unsubscribe = self.coordinator.shots.async_subscribe(self._handle_shot_event)
+
+        @callback
+        def _stop() -> None:
+            unsubscribe()
+            for group in self._groups.values():
+                group.stop_timer()
+
+        return _stop
+
+    @callback
+    def async_subscribe(
+        self, msg_id: int, interval: float, sender: StreamSender
+    ) -> CALLBACK_TYPE:
+        """Add a subscriber, returns an unsubscribe callback."""
+        group = self._groups.get(interval)
+        if group is None:
+            group = self._groups[interval] = _StreamGroup(interval)
+            if self._shot is not None:
+                group.sent = _total_samples(self._shot)
+                self._start_timer(group)
+        if self._shot is not None:
+            # Catch up on the shot in progress, the group's batches go on from
+            # where it is.
+            _send(sender, msg_id, self._started_payload(self._shot))
+            offset, channels = _samples_since(self._shot, 0, group.sent)
+            if group.sent > offset:
+                _send(
+                    sender,
+                    msg_id,
+                    self._samples_payload(self._shot, offset, channels),
+                )
+        group.senders[msg_id] = sender
+
+        @callback
+        def _unsubscribe() -> None:
+            group.senders.pop(msg_id, None)
+            if not group.senders:
+                group.stop_timer()
+                self._groups.pop(interval, None)
+
+        return _unsubscribe
+
+    @staticmethod
+    def _started_payload(shot: ShotBuffer) -> dict[str, Any]:
+        return {
+            "event": "started",
+            "shot_id": shot.shot_id,
+            "start_time": shot.start_time.isoformat(),
+        }
+
+    @staticmethod
+    def _samples_payload(
+        shot: ShotBuffer, offset: int, channels: dict[str, list[float]]
+    ) -> dict[str, Any]:
+        return {
+            "event": "samples",
+            "shot_id": shot.shot_id,
+            "offset": offset,
+            "channels": channels,
+        }
+
+    def _start_timer(self, group: _StreamGroup) -> None:
+        @callback
+        def _async_tick(_now: datetime) -> None:
+            self._flush(group)
+
+        group.unsub_timer = async_track_time_interval(
+            self.hass, _async_tick, timedelta(seconds=group.interval)
+        )
+
+    def _flush(self, group: _StreamGroup) -> None:
+        shot = self._shot
+        if shot is None or _total_samples(shot) <= group.sent:
+            return
+        offset, channels = _samples_since(shot, group.sent)
+        group.sent = _total_samples(shot)
+        group.send(self._samples_payload(shot, offset, channels))
+
+    def _end(self, payload: dict[str, Any]) -> None:
+        for group in self._groups.values():
+            self._flush(group)
+            group.stop_timer()
+            if self._shot is not None:
+                group.send({**payload, "shot_id": self._shot.shot_id})
+        self._shot = None
+
+    @callback
+    def _handle_shot_event(self, event: ShotEvent) -> None:
+        if isinstance(event, ShotStarted):
+            if self._shot is not None:
+                self._end({"event": "ended", "outcome": "discarded"})
+            self._shot = event.shot
+            for group in self._groups.values():
+                group.sent = 0
+                group.send(self._started_payload(event.shot))
+                self._start_timer(group)
+        elif self._shot is None:
+            return
+        elif isinstance(event, ShotCompleted):
+            self._end(
+                {"event": "ended", "outcome": "completed", **event.shot.summary()}
+            )
+        elif isinstance(event, ShotAborted):
+            self._end({"event": "ended", "outcome": "aborted"})
+        elif isinstance(event, ShotDiscarded):
+            self._end({"event": "ended", "outcome": "discarded"})
+        elif isinstance(event, CleaningCycle):
+            self._end({"event": "ended", "outcome": "cleaning_cycle"})
@@ -12,6 +12,7 @@ from .const import (
 )
 from .coordinator import XeniaConfigEntry, XeniaDataUpdateCoordinator
 from .entity import XeniaEntity
+from .power import PowerRequestKind, async_get_power_manager
 from .xenia import MachineStatus, SteamBoilerStatus
 
 
@@ -24,7 +25,7 @@ async def async_setup_entry(
     eco_switch = XeniaEcoSwitch(coordinator, entry)
     steam_boiler_switch = XeniaSteamBoilerSwitch(coordinator, entry)
 
-    async_add_entities([power_switch, eco_switch, steam_boiler_switch], True)
+    async_add_entities([power_switch, eco_switch, steam_boiler_switch])
 
 
 class XeniaPowerSwitch(XeniaEntity, SwitchEntity):
@@ -52,13 +53,15 @@ class XeniaPowerSwitch(XeniaEntity, SwitchEntity):
         behavior = self.coordinator.config_entry.options.get(
             CONF_POWER_ON_BEHAVIOR, DEFAULT_POWER_ON_BEHAVIOR
         )
+        power_manager = async_get_power_manager(self.hass)
         if behavior == PowerOnBehavior.STEAM_ON:
-            await self.coordinator.xenia.machine_turn_on()
+            await power_manager.async_turn_on(self.coordinator)
         elif behavior == PowerOnBehavior.STEAM_OFF:
-            await self.coordinator.xenia.machine_turn_on(False)
+            await power_manager.async_turn_on(self.coordinator, False)
         await self.coordinator.async_request_refresh()
 
     async def async_turn_off(self, **kwargs):
+        async_get_power_manager(self.hass).async_cancel(self.coordinator)
         await self.coordinator.xenia.machine_turn_off()
         await self.coordinator.async_request_refresh()
 
@@ -91,6 +94,7 @@ class XeniaEcoSwitch(XeniaEntity, SwitchEntity):
         return self.coordinator.data.overview.ma_status == MachineStatus.ECO
 
     async def async_turn_on(self, **kwargs):
+        async_get_power_manager(self.hass).async_cancel(self.coordinator)
         await self.coordinator.xenia.machine_set_eco()
         await asyncio.sleep(1)
         await self.coordinator.async_request_refresh()
@@ -99,10 +103,11 @@ class XeniaEcoSwitch(XeniaEntity, SwitchEntity):
         behavior = self.coordinator.config_entry.options.get(
             CONF_POWER_ON_BEHAVIOR, DEFAULT_POWER_ON_BEHAVIOR
         )
+        power_manager = async_get_power_manager(self.hass)
         if behavior == PowerOnBehavior.STEAM_ON:
-            await self.coordinator.xenia.machine_turn_on()
+            await power_manager.async_turn_on(self.coordinator)
         elif behavior == PowerOnBehavior.STEAM_OFF:
-            await self.coordinator.xenia.machine_turn_on(False)
+            await power_manager.async_turn_on(self.coordinator, False)
         await asyncio.sleep(1)
         await self.coordinator.async_request_refresh()
 
@@ -132,11 +137,14 @@ class XeniaSteamBoilerSwitch(XeniaEntity, SwitchEntity):
         return self.coordinator.data.overview.sb_status == SteamBoilerStatus.ON
 
     async def async_turn_on(self, **kwargs):
-        await self.coordinator.xenia.sb_turn_on()
+        await async_get_power_manager(self.hass).async_sb_turn_on(self.coordinator)
         await asyncio.sleep(1)
         await self.coordinator.async_request_refresh()
 
     async def async_turn_off(self, **kwargs):
+        async_get_power_manager(self.hass).async_cancel(
+            self.coordinator, PowerRequestKind.STEAM_BOILER
+        )
         await self.coordinator.xenia.sb_turn_off()
         await asyncio.sleep(1)
         await self.coordinator.async_request_refresh()
@@ -0,0 +1,303 @@
+"""Headless telemetry logger for Xenia espresso machines.
+
+Polls one or more machines at a fixed rate and appends every sample as an
+NDJSON line to a size rotated file, without a running Home Assistant:
+
+    python -m custom_components.xenia_home.telemetry 192.168.1.50 --rate 5
+"""
+
+import argparse
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+import json
+import math
+import os
+import sys
+import time
+from typing import Any
+
+from aiohttp import ClientError, ClientSession
+
+from .xenia import Xenia
+
+ENDPOINTS = ("overview", "overview_single")
+# Latencies kept per endpoint for the percentiles.
+LATENCY_WINDOW = 500
+
+
+@dataclass
+class LatencyStats:
+    requests: int = 0
+    errors: int = 0
+    latencies: deque[float] = field(
+        default_factory=lambda: deque(maxlen=LATENCY_WINDOW)
+    )
+
+    def add(self, latency: float) -> None:
+        self.requests += 1
+        self.latencies.append(latency)
+
+    def add_error(self) -> None:
+        self.requests += 1
+        self.errors += 1
+
+    def percentile(self, pct: float) -> float:
+        if not self.latencies:
+            return math.nan
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class RotatingWriter:
+    """Buffer lines and append them in bulk, rotating by size.
+
+    Writes happen in a worker thread, so polling isn't delayed by the disk.
+    Rotation follows logging.handlers.RotatingFileHandler: path.1 is the
+    newest backup, path.<backups> the oldest.
+    """
+
+    def __init__(
+        self, path: str, flush_every: int, max_bytes: int, backups: int
+    ) -> None:
+        self.path = path
+        self.flush_every = flush_every
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.written = 0
+        self._buffer: list[str] = []
+        self._lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def add(self, record: dict[str, Any]) -> None:
+        self._buffer.append(json.dumps(record, separators=(",", ":")) + "\n")
+        if len(self._buffer) >= self.flush_every:
+            task = asyncio.create_task(self.flush())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> None:
+        lines, self._buffer = self._buffer, []
+        if not lines:
+            return
+        async with self._lock:
+            await asyncio.to_thread(self._write, lines)
+            self.written += len(lines)
+
+    async def close(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        await self.flush()
+
+    def _write(self, lines: list[str]) -> None:
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        if size and size + sum(len(line) for line in lines) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.writelines(lines)
+
+    def _rotate(self) -> None:
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+async def _poll(
+    host: str,
+    endpoint: str,
+    fetch: Callable[[float], Awaitable[Any]],
+    interval: float,
+    timeout: float,
+    stats: LatencyStats,
+    writer: RotatingWriter,
+    deadline: float,
+) -> None:
+    # Ticks are scheduled on absolute times so slow requests don't add up to
+    # a drifting rate, ticks missed entirely are skipped.
+    next_tick = time.monotonic()
+    while next_tick < deadline:
+        started = time.perf_counter()
+        try:
+            data = await fetch(timeout)
+        except (ClientError, TimeoutError, OSError, ValueError) as err:
+            stats.add_error()
+            writer.add(
+                {
+                    "ts": time.time(),
+                    "host": host,
+                    "endpoint": endpoint,
+                    "error": str(err) or type(err).__name__,
+                }
+            )
+        else:
+            latency = (time.perf_counter() - started) * 1000
+            stats.add(latency)
+            writer.add(
+                {
+                    "ts": time.time(),
+                    "host": host,
+                    "endpoint": endpoint,
+                    "latency_ms": round(latency, 2),
+                    "data": data.to_dict(),
+                }
+            )
+        next_tick += interval
+        now = time.monotonic()
+        if next_tick < now:
+            next_tick += math.ceil((now - next_tick) / interval) * interval
+        await asyncio.sleep(next_tick - now)
+
+
+def _print_stats(
+    stats: dict[tuple[str, str], LatencyStats], writer: RotatingWriter
+) -> None:
+    lines = [
+        f"{'host':<20} {'endpoint':<16} {'req':>7} {'err':>5} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"
+    ]
+    for (host, endpoint), stat in sorted(stats.items()):
+        worst = max(stat.latencies, default=math.nan)
+        lines.append(
+            f"{host:<20} {endpoint:<16} {stat.requests:>7} {stat.errors:>5} "
+            f"{stat.percentile(50):>8.1f} {stat.percentile(95):>8.1f} "
+            f"{worst:>8.1f}"
+        )
+    lines.append(f"{writer.written} samples written to {writer.path}")
+    print("\n".join(lines) + "\n", file=sys.stderr, flush=True)
+
+
+async def _report(
+    stats: dict[tuple[str, str], LatencyStats],
+    writer: RotatingWriter,
+    interval: float,
+) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        _print_stats(stats, writer)
+
+
+async def run(args: argparse.Namespace) -> None:
+    writer = RotatingWriter(args.output, args.flush_every, args.max_bytes, args.backups)
+    stats: dict[tuple[str, str], LatencyStats] = {}
+    deadline = time.monotonic() + args.duration if args.duration else math.inf
+    async with ClientSession() as session:
+        pollers = []
+        for host in args.hosts:
+            xenia = Xenia(host, session)
+            fetchers = {
+                "overview": xenia.get_overview,
+                "overview_single": xenia.get_overview_single,
+            }
+            for endpoint in args.endpoints:
+                stat = stats[(host, endpoint)] = LatencyStats()
+                pollers.append(
+                    _poll(
+                        host,
+                        endpoint,
+                        fetchers[endpoint],
+                        1 / args.rate,
+                        args.timeout,
+                        stat,
+                        writer,
+                        deadline,
+                    )
+                )
+        reporter = asyncio.create_task(_report(stats, writer, args.stats_interval))
+        try:
+            await asyncio.gather(*pollers)
+        finally:
+            reporter.cancel()
+            await writer.close()
+            _print_stats(stats, writer)
+
+
+def _positive(kind: Callable[[str], Any]) -> Callable[[str], Any]:
+    def parse(value: str) -> Any:
+        parsed = kind(value)
+        if parsed <= 0:
+            raise argparse.ArgumentTypeError(f"must be positive: {value}")
+        return parsed
+
+    return parse
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m custom_components.xenia_home.telemetry",
+        description="Log Xenia espresso machine telemetry to a rotating file.",
+    )
+    parser.add_argument("hosts", nargs="+", help="machine host names or IPs")
+    parser.add_argument(
+        "--rate",
+        type=_positive(float),
+        default=4.0,
+        help="polls per second and endpoint (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--endpoints",
+        nargs="+",
+        choices=ENDPOINTS,
+        default=["overview"],
+        help="endpoints to poll (default: overview)",
+    )
+    parser.add_argument(
+        "--output",
+        default="xenia_telemetry.ndjson",
+        help="NDJSON output file (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--flush-every",
+        type=_positive(int),
+        default=100,
+        help="samples buffered per write (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=_positive(int),
+        default=50_000_000,
+        help="rotate the output beyond this size (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--backups",
+        type=int,
+        default=5,
+        help="rotated files to keep (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=_positive(float),
+        default=2.0,
+        help="request timeout in seconds (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--stats-interval",
+        type=_positive(float),
+        default=5.0,
+        help="seconds between latency reports (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--duration",
+        type=_positive(float),
+        help="stop after this many seconds (default: run until interrupted)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    try:
+        asyncio.run(run(parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
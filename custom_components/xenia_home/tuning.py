@@ -0,0 +1,127 @@
+"""Latency driven tuning of the poll interval."""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+import logging
+import math
+
+_LOGGER = logging.getLogger(__name__)
+
+INITIAL_INTERVAL = 1.0
+MAX_INTERVAL = 10.0
+# AIMD on the poll rate: healthy ticks add ADDITIVE_STEP Hz, failures and
+# slow ticks scale it down.
+ADDITIVE_STEP = 0.05
+ERROR_BACKOFF = 0.5
+LATENCY_BACKOFF = 0.75
+# A tick is healthy while its p95 duration uses at most this share of the
+# interval, the rest is left to the machine and the listeners.
+HEALTHY_SHARE = 0.5
+# Healthy ticks required after a back off before speeding up again.
+BACKOFF_HOLD_TICKS = 10
+RTT_WINDOW = 20
+# Bounds of the pause between the two requests of a tick.
+MIN_REQUEST_GAP = 0.05
+MAX_REQUEST_GAP = 0.5
+
+
+def _p95(values: deque[float]) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(len(ordered) * 0.95) - 1)]
+
+
+@dataclass
+class EndpointLatency:
+    """Recent round trip times and failures of one endpoint."""
+
+    rtts: deque[float] = field(default_factory=lambda: deque(maxlen=RTT_WINDOW))
+    requests: int = 0
+    errors: int = 0
+    # Cumulative round trip time of successful requests in seconds.
+    rtt_sum: float = 0.0
+
+    @property
+    def p95(self) -> float | None:
+        """Return the p95 round trip time in seconds."""
+        return _p95(self.rtts) if self.rtts else None
+
+    @property
+    def error_rate(self) -> float:
+        """Return the share of failed requests."""
+        return self.errors / self.requests if self.requests else 0.0
+
+
+class XeniaPollTuner:
+    """Adapt the poll interval to how fast the machine answers.
+
+    The rate grows additively while ticks stay well within their interval and
+    shrinks multiplicatively on failures or when the p95 tick duration
+    exceeds its share, bounded by the configured minimum interval.
+    """
+
+    def __init__(self, min_interval: float) -> None:
+        """Initialize the tuner."""
+        self.min_interval = min_interval
+        self.interval = max(INITIAL_INTERVAL, min_interval)
+        self.endpoints: dict[str, EndpointLatency] = {}
+        self._ticks: deque[float] = deque(maxlen=RTT_WINDOW)
+        self._hold = 0
+
+    @property
+    def rate(self) -> float:
+        """Return the effective poll rate in Hz."""
+        return 1 / self.interval
+
+    @property
+    def update_interval(self) -> timedelta:
+        """Return the interval to schedule the next tick with."""
+        return timedelta(seconds=self.interval)
+
+    def request_gap(self) -> float:
+        """Return the pause between the requests of a tick.
+
+        A slow machine gets as much breathing room as its recent answers
+        took, a fast one doesn't waste half the interval waiting.
+        """
+        overview = self.endpoints.get("overview")
+        p95 = overview.p95 if overview is not None else None
+        if p95 is None:
+            return MAX_REQUEST_GAP
+        return min(max(p95, MIN_REQUEST_GAP), MAX_REQUEST_GAP, self.interval / 4)
+
+    def record(self, endpoint: str, rtt: float | None) -> None:
+        """Record a request, rtt is None if it failed."""
+        stats = self.endpoints.setdefault(endpoint, EndpointLatency())
+        stats.requests += 1
+        if rtt is None:
+            stats.errors += 1
+        else:
+            stats.rtts.append(rtt)
+            stats.rtt_sum += rtt
+
+    def tick_succeeded(self, duration: float) -> None:
+        """Adjust the interval after a complete tick that took duration."""
+        self._ticks.append(duration)
+        if _p95(self._ticks) > self.interval * HEALTHY_SHARE:
+            self._back_off(LATENCY_BACKOFF, "p95 tick duration above budget")
+        elif self._hold > 0:
+            self._hold -= 1
+        else:
+            self._set_rate(self.rate + ADDITIVE_STEP)
+
+    def tick_failed(self) -> None:
+        """Back off after a tick with a failed request."""
+        self._back_off(ERROR_BACKOFF, "request failed")
+
+    def _back_off(self, factor: float, reason: str) -> None:
+        self._hold = BACKOFF_HOLD_TICKS
+        # Durations measured at the old rate would trigger again right away.
+        self._ticks.clear()
+        self._set_rate(self.rate * factor)
+        _LOGGER.debug("Backing off to %.2f Hz: %s", self.rate, reason)
+
+    def _set_rate(self, rate: float) -> None:
+        self.interval = min(max(1 / rate, self.min_interval), MAX_INTERVAL)
@@ -0,0 +1,85 @@
+"""WebSocket API for the Xenia frontend card."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, callback
+
+from .const import XENIA_DOMAIN
+from .coordinator import XeniaDataUpdateCoordinator
+from .stream import DEFAULT_BATCH_INTERVAL
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Register the WebSocket commands."""
+    websocket_api.async_register_command(hass, ws_shot_curves)
+    websocket_api.async_register_command(hass, ws_subscribe_shot)
+
+
+def _get_coordinator(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> XeniaDataUpdateCoordinator | None:
+    entry = hass.config_entries.async_get_entry(msg["config_entry_id"])
+    if (
+        entry is None
+        or entry.domain != XENIA_DOMAIN
+        or entry.state is not ConfigEntryState.LOADED
+    ):
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Config entry not loaded"
+        )
+        return None
+    return entry.runtime_data
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{XENIA_DOMAIN}/shot_curves",
+        vol.Required("config_entry_id"): str,
+        vol.Required("shot_id"): str,
+    }
+)
+@websocket_api.async_response
+async def ws_shot_curves(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Send the encoded curves of a shot."""
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    curves = await coordinator.curves.async_get(msg["shot_id"])
+    if curves is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Unknown shot")
+        return
+    connection.send_result(msg["id"], curves)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{XENIA_DOMAIN}/subscribe_shot",
+        vol.Required("config_entry_id"): str,
+        vol.Optional("batch_interval", default=DEFAULT_BATCH_INTERVAL): vol.All(
+            vol.Coerce(float), vol.Range(min=0.2, max=10)
+        ),
+    }
+)
+@callback
+def ws_subscribe_shot(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Stream the samples of shots in progress."""
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    connection.send_result(msg["id"])
+    connection.subscriptions[msg["id"]] = coordinator.stream.async_subscribe(
+        msg["id"], msg["batch_interval"], connection.send_message
+    )
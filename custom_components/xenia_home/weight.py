@@ -0,0 +1,191 @@
+"""Predictive target weight notification from live scale data."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, callback
+
+from .const import CONF_TARGET_WEIGHT, DEFAULT_TARGET_WEIGHT
+from .shot import ShotBuffer, ShotCompleted, ShotEvent, ShotSampleAdded, ShotStarted
+
+if TYPE_CHECKING:
+    from .coordinator import XeniaDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Number of recent samples used for the weight slope.
+SLOPE_SAMPLES = 4
+# Below this the scale is considered not to be receiving coffee.
+MIN_FLOW_G_PER_S = 0.2
+TARGET_WEIGHT_TOLERANCE = 1.0
+# Learning rate and bounds for the self-calibrating bias.
+BIAS_ALPHA = 0.3
+BIAS_MIN = -5.0
+BIAS_MAX = 10.0
+
+
+@dataclass(frozen=True)
+class TargetWeightApproaching:
+    """The shot is predicted to reach the target weight within the lead time."""
+
+    target_weight: float
+    weight: float
+    flow: float
+    lead_seconds: float
+    predicted_weight: float
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class TargetWeightResult:
+    """Prediction quality of a completed shot."""
+
+    target_weight: float
+    alert_weight: float | None
+    predicted_weight: float | None
+    final_weight: float
+    error: float
+    within_tolerance: bool
+    bias: float
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return asdict(self)
+
+
+type TargetWeightListener = Callable[[TargetWeightApproaching], None]
+
+
+def _weight_slope(shot: ShotBuffer) -> float:
+    """Return the least squares slope in g/s over the most recent samples."""
+    count = min(SLOPE_SAMPLES, len(shot))
+    if count < 2:
+        return 0.0
+    times = [shot.timestamps[-i] for i in range(count, 0, -1)]
+    weights = [shot.weights[-i] for i in range(count, 0, -1)]
+    mean_t = sum(times) / count
+    mean_w = sum(weights) / count
+    var_t = sum((t - mean_t) ** 2 for t in times)
+    if var_t <= 0:
+        return 0.0
+    return sum((t - mean_t) * (w - mean_w) for t, w in zip(times, weights)) / var_t
+
+
+class XeniaTargetWeightPredictor:
+    """Extrapolate the cup weight and alert before the target is reached.
+
+    The lead time covers the age of the data when it is processed plus one
+    poll interval, since the next sample might already be too late. Whatever
+    still lands in the cup after the alert (drips, reaction time) is learned
+    per machine as a bias from the final weight of each shot.
+    """
+
+    def __init__(self, coordinator: XeniaDataUpdateCoordinator) -> None:
+        """Initialize the predictor."""
+        self.coordinator = coordinator
+        self.bias = 0.0
+        self.last_result: TargetWeightResult | None = None
+        self._listeners: list[TargetWeightListener] = []
+        self._alert: TargetWeightApproaching | None = None
+
+    @property
+    def target_weight(self) -> float:
+        """Return the configured target weight, 0 when disabled."""
+        return float(
+            self.coordinator.config_entry.options.get(
+                CONF_TARGET_WEIGHT, DEFAULT_TARGET_WEIGHT
+            )
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the learned state for persistence."""
+        return {"bias": self.bias}
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Restore the learned state."""
+        self.bias = float(data.get("bias", 0.0))
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start following the shot pipeline, returns a stop callback."""
+        return self.coordinator.shots.async_subscribe(self._handle_shot_event)
+
+    @callback
+    def async_subscribe(self, listener: TargetWeightListener) -> CALLBACK_TYPE:
+        """Subscribe to target weight alerts, returns an unsubscribe callback."""
+        self._listeners.append(listener)
+
+        @callback
+        def _unsubscribe() -> None:
+            self._listeners.remove(listener)
+
+        return _unsubscribe
+
+    def _lead_seconds(self) -> float:
+        lead = self.coordinator.update_interval.total_seconds()
+        if self.coordinator.overview_received is not None:
+            lead += time.monotonic() - self.coordinator.overview_received
+        return lead
+
+    @callback
+    def _handle_shot_event(self, event: ShotEvent) -> None:
+        if isinstance(event, ShotStarted):
+            self._alert = None
+            self.last_result = None
+        elif isinstance(event, ShotSampleAdded):
+            self._handle_sample(event.shot)
+        elif isinstance(event, ShotCompleted):
+            self._handle_completed(event)
+
+    def _handle_sample(self, shot: ShotBuffer) -> None:
+        target = self.target_weight
+        if target <= 0 or self._alert is not None or shot.brew_end_time is not None:
+            return
+        flow = _weight_slope(shot)
+        if flow < MIN_FLOW_G_PER_S:
+            return
+        weight = shot.weights[-1]
+        lead = self._lead_seconds()
+        predicted = weight + flow * lead + self.bias
+        if predicted < target:
+            return
+
+        self._alert = TargetWeightApproaching(
+            target_weight=target,
+            weight=round(weight, 2),
+            flow=round(flow, 2),
+            lead_seconds=round(lead, 2),
+            predicted_weight=round(predicted, 2),
+        )
+        _LOGGER.debug("Target weight approaching: %s", self._alert)
+        for listener in list(self._listeners):
+            listener(self._alert)
+
+    def _handle_completed(self, event: ShotCompleted) -> None:
+        target = self.target_weight
+        if target <= 0 or not event.shot.weights:
+            return
+        final_weight = max(event.shot.weights)
+        error = final_weight - target
+        if self._alert is not None:
+            # Only shots that were alerted tell us how much arrives afterwards.
+            self.bias = min(max(self.bias + BIAS_ALPHA * error, BIAS_MIN), BIAS_MAX)
+            self.coordinator.schedule_cache_save(force=True)
+        self.last_result = TargetWeightResult(
+            target_weight=target,
+            alert_weight=self._alert.weight if self._alert else None,
+            predicted_weight=self._alert.predicted_weight if self._alert else None,
+            final_weight=round(final_weight, 2),
+            error=round(error, 2),
+            within_tolerance=abs(error) <= TARGET_WEIGHT_TOLERANCE,
+            bias=round(self.bias, 2),
+        )
+        self._alert = None
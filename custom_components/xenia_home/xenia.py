@@ -1,12 +1,17 @@
+from collections.abc import Callable
 from dataclasses import dataclass
 from enum import IntEnum
+import hashlib
+import json
 import logging
-from typing import Any
+from typing import Any, TypeVar
 
 from aiohttp import ClientSession
 
 _LOGGER = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
 
 class MachineControl(IntEnum):
     OFF = 0
@@ -95,6 +100,28 @@ class XeniaOverviewData:
             scale_weight=float(data.get("SCALE_WEIGHT", 0.0)),
         )
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "MA_EXTRACTIONS": self.ma_extractions,
+            "MA_OPERATING_HOURS": self.ma_operating_hours,
+            "MA_STATUS": int(self.ma_status),
+            "MA_CLOCK": self.ma_clock,
+            "MA_CUR_PWR": self.ma_cur_pwr,
+            "MA_MAX_PWR": self.ma_max_pwr,
+            "MA_ENERGY_TOTAL_KWH": self.ma_energy_total_kwh,
+            "BG_SENS_TEMP_A": self.bg_sens_temp_a,
+            "BG_LEVEL_PW_CONTROL": self.bg_level_pw_control,
+            "PU_SENS_PRESS": self.pu_sens_press,
+            "PU_LEVEL_PW_CONTROL": self.pu_level_pw_control,
+            "PU_SET_LEVEL_PW_CONTROL": self.pu_set_level_pw_control,
+            "PU_SENS_FLOW_METER_ML": self.pu_sens_flow_meter_ml,
+            "SB_SENS_PRESS": self.sb_sens_press,
+            "BB_SENS_TEMP_A": self.bb_sens_temp_a,
+            "BB_LEVEL_PW_CONTROL": self.bb_level_pw_control,
+            "SB_STATUS": int(self.sb_status),
+            "SCALE_WEIGHT": self.scale_weight,
+        }
+
 
 @dataclass
 class XeniaOverviewSingleData:
@@ -123,6 +150,19 @@ class XeniaOverviewSingleData:
             pop_up=data.get("POP_UP"),
         )
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "BG_SET_TEMP": self.bg_set_temp,
+            "PU_SET_PRESS": self.pu_set_press,
+            "PU_SENS_WATER_TANK_LEVEL": self.pu_sens_water_tank_level,
+            "SB_SET_PRESS": self.sb_set_press,
+            "BB_SET_TEMP": self.bb_set_temp,
+            "PSP": self.psp,
+            "MA_MAC": self.ma_mac,
+            "MA_EXTRACTIONS_START": self.ma_extractions_start,
+            "POP_UP": self.pop_up,
+        }
+
 
 @dataclass
 class XeniaMachineData:
@@ -142,6 +182,15 @@ class XeniaMachineData:
             esp_fw_minor=_safe_int(data.get("ESP_FW_MINOR")),
         )
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "MA_TYPE": self.ma_type,
+            "FW_VERSION_MAJOR": self.fw_version_major,
+            "FW_VERSION_MINOR": self.fw_version_minor,
+            "ESP_FW_MAJOR": self.esp_fw_major,
+            "ESP_FW_MINOR": self.esp_fw_minor,
+        }
+
     def fw_version(self) -> str | None:
         if self.fw_version_major is None or self.fw_version_minor is None:
             return None
@@ -152,6 +201,13 @@ class XeniaMachineData:
             return None
         return f"{self.esp_fw_major}.{self.esp_fw_minor}"
 
+    def sw_version(self) -> str | None:
+        fw_version = self.fw_version()
+        esp_fw_version = self.esp_fw_version()
+        if fw_version and esp_fw_version:
+            return f"{fw_version}/{esp_fw_version}"
+        return None
+
 
 def _safe_int(value: Any) -> int | None:
     if value is None:
@@ -162,10 +218,25 @@ def _safe_int(value: Any) -> int | None:
         return None
 
 
+@dataclass
+class XeniaEndpointStats:
+    requests: int = 0
+    unchanged: int = 0
+
+    @property
+    def skip_rate(self) -> float:
+        if not self.requests:
+            return 0.0
+        return self.unchanged / self.requests
+
+
 class Xenia:
     def __init__(self, host: str, session: ClientSession):
         self._host = host
         self._session = session
+        self._fingerprints: dict[str, bytes] = {}
+        self._decoded: dict[str, Any] = {}
+        self.stats: dict[str, XeniaEndpointStats] = {}
 
     async def device_connected(self) -> bool:
         try:
@@ -195,20 +266,69 @@ class Xenia:
     async def sb_turn_off(self):
         await self._toggle_sb(False)
 
+    async def _get_status_raw(self, timeout: float = 10) -> dict[str, Any]:
+        url = f"http://{self._host}/api/v2/status"
+        async with self._session.get(url, timeout=timeout) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    async def get_status(self, timeout: float = 10) -> MachineStatus | None:
+        json_data = await self._get_status_raw(timeout)
+        if "MA_STATUS" not in json_data:
+            return None
+        try:
+            return MachineStatus(json_data["MA_STATUS"])
+        except ValueError:
+            return MachineStatus.UNKNOWN
+
     async def _get_overview_raw(self) -> dict[str, Any]:
         url = f"http://{self._host}/api/v2/overview"
         async with self._session.get(url, timeout=10) as resp:
             resp.raise_for_status()
             return await resp.json()
 
-    async def get_overview(self) -> XeniaOverviewData:
-        return XeniaOverviewData.from_dict(await self._get_overview_raw())
+    async def _get_decoded(
+        self, endpoint: str, decode: Callable[[dict], _T], timeout: float = 10
+    ) -> _T:
+        """Fetch an endpoint, reusing the last decoded result for identical bodies.
 
-    async def get_overview_single(self) -> XeniaOverviewSingleData:
-        url = f"http://{self._host}/api/v2/overview_single"
-        async with self._session.get(url, timeout=10) as resp:
+        An unchanged response returns the very same object as the previous
+        call, so callers can detect "no change" with an identity check.
+        """
+        url = f"http://{self._host}/api/v2/{endpoint}"
+        async with self._session.get(url, timeout=timeout) as resp:
             resp.raise_for_status()
-            return XeniaOverviewSingleData.from_dict(await resp.json())
+            body = await resp.read()
+
+        stats = self.stats.setdefault(endpoint, XeniaEndpointStats())
+        stats.requests += 1
+        fingerprint = hashlib.blake2b(body, digest_size=16).digest()
+        if self._fingerprints.get(endpoint) == fingerprint:
+            stats.unchanged += 1
+            return self._decoded[endpoint]
+
+        decoded = decode(json.loads(body))
+        self._fingerprints[endpoint] = fingerprint
+        self._decoded[endpoint] = decoded
+        return decoded
+
+    async def get_overview(self, timeout: float = 10) -> XeniaOverviewData:
+        return await self._get_decoded(
+            "overview", XeniaOverviewData.from_dict, timeout
+        )
+
+    async def get_overview_single(
+        self, timeout: float = 10
+    ) -> XeniaOverviewSingleData:
+        return await self._get_decoded(
+            "overview_single", XeniaOverviewSingleData.from_dict, timeout
+        )
+
+    def unchanged_response_rate(self) -> float:
+        requests = sum(stats.requests for stats in self.stats.values())
+        if not requests:
+            return 0.0
+        return sum(stats.unchanged for stats in self.stats.values()) / requests
 
     async def get_machine(self) -> XeniaMachineData:
         url = f"http://{self._host}/api/v2/machine"